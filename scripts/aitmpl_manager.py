@@ -4,11 +4,22 @@ AITMPL 템플릿 매니저 - 통합 CLI
 
 Usage:
   python aitmpl-manager.py sync                    # 인덱스 업데이트
+  python aitmpl-manager.py sync --mirror           # 캐시된 미러로 증분 업데이트
+  python aitmpl-manager.py sync --source repo.tar.gz  # 오프라인: tarball/번들에서 인덱싱
+  python aitmpl-manager.py sync --blobless         # blobless clone 트리만으로 인덱싱
+  python aitmpl-manager.py sync --sources sources.json  # 여러 저장소를 동시에 받아 병합
+  python aitmpl-manager.py sync --watch ../claude-code-templates  # 로컬 체크아웃 감시, 바뀐 부분만 갱신
   python aitmpl-manager.py search -t security      # 태그로 검색
   python aitmpl-manager.py search debugger         # 키워드로 검색
-  python aitmpl-manager.py install frontend        # 세트 설치
+  python aitmpl-manager.py search -k 10 sql audit  # 본문 포함 랭킹 검색
+  python aitmpl-manager.py install frontend        # 세트 설치 (로컬 저장소에 있으면 npx 없이)
+  python aitmpl-manager.py install frontend backend  # 여러 세트를 하나의 계획으로 설치
+  python aitmpl-manager.py install --resume        # 중단/실패한 설치 이어서 진행
+  python aitmpl-manager.py outdated                # 설치된 템플릿이 인덱스와 같은지 확인 (오프라인)
   python aitmpl-manager.py list-sets               # 세트 목록
   python aitmpl-manager.py list-tags               # 태그 목록
+  python aitmpl-manager.py serve                   # 검색 데몬 (search 가 자동 사용)
+  python aitmpl-manager.py cache-stats             # 검색 결과 캐시 적중률
 """
 
 import argparse
@@ -24,42 +35,56 @@ if SCRIPT_DIR not in sys.path:
 def cmd_sync(args):
     """인덱스 동기화"""
     try:
-        from sync_aitmpl_index import build_index_from_clone, save_index
-        import json
-
-        index = build_index_from_clone()
-        if args.dry_run:
-            print(json.dumps(index, indent=2, ensure_ascii=False))
-        else:
-            save_index(index, args.output)
+        from sync_aitmpl_index import run_sync
     except ImportError as e:
         print(f"Error importing sync module: {e}")
         print("Make sure sync_aitmpl_index.py is in the same directory")
         sys.exit(1)
+    run_sync(args)
+
+
+def try_daemon(request: dict, args) -> bool:
+    """검색 데몬이 실행 중이면 요청을 보내고 결과 출력 (처리했으면 True)"""
+    if args.no_daemon:
+        return False
+    try:
+        from serve_aitmpl import query_daemon
+    except ImportError:
+        return False
+
+    return query_daemon(request, args.socket, sys.stdout) is not None
 
 
 def cmd_search(args):
     """템플릿 검색"""
+    if (args.tags or args.query) and try_daemon({
+        "op": "search",
+        "index": os.path.abspath(args.index),
+        "query": args.query,
+        "tags": args.tags,
+        "top": args.top,
+        "format": args.format,
+        "limit": args.limit,
+        "offset": args.offset,
+        "match": args.match,
+    }, args):
+        return
+
     try:
-        from search_aitmpl import (
-            search_by_tags, search_templates, print_results, load_index
-        )
-
-        if args.tags:
-            results = search_by_tags(args.tags)
-            print_results(results, args.format)
-        elif args.query:
-            index = load_index(args.index)
-            if not index:
-                sys.exit(1)
-            for q in args.query:
-                results = search_templates(q, index)
-                if len(args.query) > 1:
-                    print(f"\n=== Results for '{q}' ===")
-                print_results(results, args.format)
-        else:
+        from search_aitmpl import render_search
+        from search_cache import cached_render
+
+        if not (args.tags or args.query):
             print("Error: Provide either --tags or a search query")
             sys.exit(1)
+
+        request = vars(args)
+        if args.no_cache:
+            ok = render_search(request)
+        else:
+            ok = cached_render(args.index, request, lambda: render_search(request))
+        if not ok:
+            sys.exit(1)
     except ImportError as e:
         print(f"Error importing search module: {e}")
         sys.exit(1)
@@ -68,8 +93,31 @@ def cmd_search(args):
 def cmd_install(args):
     """템플릿 세트 설치"""
     try:
-        from install_template_set import install_set
-        install_set(args.set_name, args.file, args.dry_run)
+        from install_template_set import install_set, resume_install
+        if args.resume:
+            ok = resume_install(args.jobs, args.batch, store_dir=args.store_dir,
+                                retries=args.retries)
+        elif args.set_names:
+            ok = install_set(args.set_names, args.file, args.dry_run, args.index, args.jobs,
+                             args.batch, args.force, native=not args.no_native,
+                             store_dir=args.store_dir, skip_missing=args.skip_missing,
+                             retries=args.retries)
+        else:
+            print("Error: Provide a set name or --resume")
+            ok = False
+        if not ok:
+            sys.exit(1)
+    except ImportError as e:
+        print(f"Error importing install module: {e}")
+        sys.exit(1)
+
+
+def cmd_outdated(args):
+    """설치된 템플릿 상태 확인"""
+    try:
+        from install_template_set import check_outdated
+        if not check_outdated(args.index, args.ledger, workers=args.jobs):
+            sys.exit(1)
     except ImportError as e:
         print(f"Error importing install module: {e}")
         sys.exit(1)
@@ -88,13 +136,36 @@ def cmd_list_sets(args):
 def cmd_list_tags(args):
     """태그 목록"""
     try:
-        from search_aitmpl import list_tags
-        list_tags()
+        from search_aitmpl import list_tags, is_sqlite_store, open_store, load_tag_table
+        if is_sqlite_store(args.index):
+            list_tags(open_store(args.index), load_tag_table(args.index))
+        elif not try_daemon({"op": "list-tags", "index": os.path.abspath(args.index)}, args):
+            list_tags(table=load_tag_table(args.index))
     except ImportError as e:
         print(f"Error importing search module: {e}")
         sys.exit(1)
 
 
+def cmd_cache_stats(args):
+    """검색 캐시 통계"""
+    try:
+        from search_cache import print_cache_stats
+        print_cache_stats(args.index, args.clear)
+    except ImportError as e:
+        print(f"Error importing cache module: {e}")
+        sys.exit(1)
+
+
+def cmd_serve(args):
+    """검색 데몬 실행"""
+    try:
+        from serve_aitmpl import serve
+        serve(args.index, args.socket)
+    except ImportError as e:
+        print(f"Error importing serve module: {e}")
+        sys.exit(1)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="AITMPL Template Manager - Unified CLI",
@@ -104,8 +175,10 @@ Commands:
   sync         Sync index from GitHub API
   search       Search templates by keyword or tag
   install      Install a template set
+  outdated     Compare installed templates with the index (offline)
   list-sets    List available template sets
   list-tags    List available search tags
+  serve        Run the resident search daemon (used automatically by search)
 
 Examples:
   %(prog)s sync                        # Update index
@@ -113,38 +186,85 @@ Examples:
   %(prog)s search debugger             # Search by keyword
   %(prog)s install frontend            # Install set
   %(prog)s install frontend --dry-run  # Preview installation
+  %(prog)s outdated                    # Find stale and locally modified templates
+  %(prog)s serve &                     # Keep the index in memory for fast searches
         """
     )
 
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
-    # sync 명령
+    # sync 명령 (옵션은 sync_aitmpl_index.py 와 공유, 무거운 sync 모듈은 sync 실행 시에만 import)
     sync_parser = subparsers.add_parser("sync", help="Sync index from GitHub")
-    sync_parser.add_argument("-o", "--output", default=".claude/aitmpl-index.json",
-                             help="Output file path")
-    sync_parser.add_argument("--dry-run", action="store_true",
-                             help="Print without saving")
+    if sys.argv[1:2] == ["sync"]:
+        try:
+            from sync_aitmpl_index import add_sync_arguments
+            add_sync_arguments(sync_parser)
+        except ImportError:
+            pass  # cmd_sync 에서 오류 출력
     sync_parser.set_defaults(func=cmd_sync)
 
     # search 명령
     search_parser = subparsers.add_parser("search", help="Search templates")
     search_parser.add_argument("query", nargs="*", help="Search keyword")
     search_parser.add_argument("-t", "--tags", nargs="+", help="Search by tags")
-    search_parser.add_argument("-f", "--format", choices=["table", "commands", "json"],
+    search_parser.add_argument("-f", "--format", choices=["table", "commands", "json", "ndjson"],
                                default="table", help="Output format")
+    search_parser.add_argument("--limit", type=int, metavar="N", help="Show at most N results")
+    search_parser.add_argument("--offset", type=int, default=0, metavar="N",
+                               help="Skip the first N results")
+    search_parser.add_argument("--match", choices=["each", "any", "all"], default="each",
+                               help="Multiple keywords: per keyword, any (OR) or all (AND)")
     search_parser.add_argument("-i", "--index", default=".claude/aitmpl-index.json",
                                help="Index file path")
+    search_parser.add_argument("-k", "--top", type=int, metavar="K",
+                               help="Ranked full-text search over template content, top K")
+    search_parser.add_argument("--socket", default=".claude/aitmpl.sock",
+                               help="Search daemon socket")
+    search_parser.add_argument("--no-daemon", action="store_true",
+                               help="Do not use a running search daemon")
+    search_parser.add_argument("--no-cache", action="store_true",
+                               help="Do not read or store results in the search cache")
     search_parser.set_defaults(func=cmd_search)
 
     # install 명령
     install_parser = subparsers.add_parser("install", help="Install template set")
-    install_parser.add_argument("set_name", help="Set name to install")
+    install_parser.add_argument("set_names", nargs="*", metavar="SET",
+                                help="Set name(s) to install, merged into one plan")
     install_parser.add_argument("--dry-run", action="store_true",
                                 help="Show commands without executing")
     install_parser.add_argument("-f", "--file", default=".claude/template-sets.yaml",
                                 help="Template sets file")
+    install_parser.add_argument("-i", "--index", default=".claude/aitmpl-index.json",
+                                help="Index used to validate templates (.json or .db)")
+    install_parser.add_argument("-j", "--jobs", type=int, default=1,
+                                help="Number of installs to run concurrently")
+    install_parser.add_argument("--batch", action="store_true",
+                                help="Install several templates of one type per npx call")
+    install_parser.add_argument("--force", action="store_true",
+                                help="Reinstall templates recorded as up to date")
+    install_parser.add_argument("--no-native", action="store_true",
+                                help="Install everything through npx, ignore the local store")
+    install_parser.add_argument("--store-dir", default=".claude/aitmpl-store",
+                                help="Local template store filled by sync")
+    install_parser.add_argument("--skip-missing", action="store_true",
+                                help="Install the templates that exist instead of aborting on missing ones")
+    install_parser.add_argument("--resume", action="store_true",
+                                help="Continue the last run from its journal (unfinished and failed jobs only)")
+    install_parser.add_argument("--retries", type=int, default=2,
+                                help="Retries per failed npx install, with backoff")
     install_parser.set_defaults(func=cmd_install)
 
+    # outdated 명령
+    outdated_parser = subparsers.add_parser("outdated",
+                                            help="List stale, locally modified and up-to-date templates")
+    outdated_parser.add_argument("-i", "--index", default=".claude/aitmpl-index.json",
+                                 help="Index file path (.json or .db)")
+    outdated_parser.add_argument("--ledger", default=".claude/aitmpl-installed.json",
+                                 help="Install ledger written by install")
+    outdated_parser.add_argument("-j", "--jobs", type=int, default=None,
+                                 help="Number of files to hash concurrently")
+    outdated_parser.set_defaults(func=cmd_outdated)
+
     # list-sets 명령
     list_sets_parser = subparsers.add_parser("list-sets", help="List available sets")
     list_sets_parser.add_argument("-f", "--file", default=".claude/template-sets.yaml",
@@ -153,8 +273,30 @@ Examples:
 
     # list-tags 명령
     list_tags_parser = subparsers.add_parser("list-tags", help="List available tags")
+    list_tags_parser.add_argument("-i", "--index", default=".claude/aitmpl-index.json",
+                                  help="Index file path (.db shows indexed counts)")
+    list_tags_parser.add_argument("--socket", default=".claude/aitmpl.sock",
+                                  help="Search daemon socket")
+    list_tags_parser.add_argument("--no-daemon", action="store_true",
+                                  help="Do not use a running search daemon")
     list_tags_parser.set_defaults(func=cmd_list_tags)
 
+    # cache-stats 명령
+    cache_stats_parser = subparsers.add_parser("cache-stats", help="Show search cache hit/miss statistics")
+    cache_stats_parser.add_argument("-i", "--index", default=".claude/aitmpl-index.json",
+                                    help="Index file path (the cache lives next to it)")
+    cache_stats_parser.add_argument("--clear", action="store_true",
+                                    help="Remove all cached results and reset the statistics")
+    cache_stats_parser.set_defaults(func=cmd_cache_stats)
+
+    # serve 명령
+    serve_parser = subparsers.add_parser("serve", help="Run the resident search daemon")
+    serve_parser.add_argument("-i", "--index", default=".claude/aitmpl-index.json",
+                              help="Index file path")
+    serve_parser.add_argument("-s", "--socket", default=".claude/aitmpl.sock",
+                              help="Unix socket path")
+    serve_parser.set_defaults(func=cmd_serve)
+
     args = parser.parse_args()
 
     if args.command is None:
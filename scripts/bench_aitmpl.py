@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+AITMPL 벤치마크 스위트
+합성 cli-tool/components 트리와 template-sets.yaml 로 단계별 시간/메모리 측정
+(scan, hash_templates, save_index, load_index[_compact], search_*, resolve_tags,
+ load_sets[_cached], compile_sets, resolve_set, list_sets)
+저장된 기준값보다 느려지면 실패
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from sync_aitmpl_index import (
+    CATEGORIES, COMPONENTS_PATH, hash_templates, save_index, scan_categories, scan_category
+)
+from search_aitmpl import TAG_MAPPINGS, load_index, load_sidecar, resolve_tags, search_templates
+
+DEFAULT_SCALES = [10000, 50000]
+DEFAULT_DEPTH = 40
+DEFAULT_TOLERANCE = 0.5
+# 너무 짧은 단계는 타이머 잡음이 크므로 이 시간 이하 차이는 회귀로 보지 않음
+MIN_REGRESSION_SECONDS = 0.02
+SEARCH_QUERIES = ["template", "group-01", "skill-0001", "nested", "readme", "zzz", "e-0", "json"]
+
+
+def generate_tree(root: Path, templates: int, subdirs: int = 40, seed: int = 0,
+                  max_body: int = 4000) -> int:
+    """합성 컴포넌트 트리 생성 (직접 파일, SKILL.md 폴더, 중첩 폴더 혼합)"""
+    rng = random.Random(seed)
+    components = root / COMPONENTS_PATH
+    per_category = max(1, templates // len(CATEGORIES))
+    created = 0
+
+    for category in CATEGORIES:
+        category_path = components / category
+        category_path.mkdir(parents=True, exist_ok=True)
+        # 카테고리 루트 파일 (root 서브카테고리)
+        (category_path / "README.md").write_text("# readme\n", encoding="utf-8")
+        created += 1
+
+        for i in range(per_category):
+            subdir = category_path / f"group-{i % subdirs:03d}"
+            subdir.mkdir(exist_ok=True)
+            body = "x" * rng.randint(min(200, max_body), max_body)
+            kind = rng.random()
+            if category == "skills" and kind < 0.6:
+                skill = subdir / f"skill-{i:06d}"
+                (skill / "references").mkdir(parents=True, exist_ok=True)
+                (skill / "SKILL.md").write_text(body, encoding="utf-8")
+                (skill / "references" / "notes.md").write_text("notes\n", encoding="utf-8")
+            elif kind < 0.05:
+                nested = subdir / f"nested-{i:06d}"
+                nested.mkdir(exist_ok=True)
+                (nested / "one.md").write_text(body, encoding="utf-8")
+                (nested / "two.json").write_text("{}", encoding="utf-8")
+            else:
+                suffix = ".json" if category in ("hooks", "mcps", "settings") else ".md"
+                (subdir / f"template-{i:06d}{suffix}").write_text(body, encoding="utf-8")
+            created += 1
+
+    return created
+
+
+def generate_sets(path: Path, index: dict, sets: int = 200, depth: int = DEFAULT_DEPTH,
+                  items: int = 8, seed: int = 0):
+    """합성 template-sets.yaml 생성 (깊은 extends 체인 + 다이아몬드 상속)"""
+    import yaml
+
+    rng = random.Random(seed)
+    pool = {}
+    for category, subcats in index.get("categories", {}).items():
+        pool[category] = [
+            f"{subcat}/{tmpl['name']}"
+            for subcat, templates in subcats.items() if subcat != "root"
+            for tmpl in templates
+        ]
+
+    data = {"sets": {}}
+    for i in range(sets):
+        set_def = {"description": f"Synthetic set {i}"}
+        for category, candidates in pool.items():
+            if candidates:
+                set_def[category] = rng.sample(candidates, min(items, len(candidates)))
+        # 체인마다 depth 단계, 체인 안에서는 직전 두 세트를 상속 (다이아몬드)
+        position = i % depth
+        if position >= 1:
+            set_def["extends"] = [f"set-{i - 1:05d}"]
+        if position >= 2:
+            set_def["extends"].append(f"set-{i - 2:05d}")
+        data["sets"][f"set-{i:05d}"] = set_def
+
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, sort_keys=False)
+
+
+def measure(func, repeat: int = 1, memory: bool = True) -> dict:
+    """최소 실행 시간(초), 최대 메모리와 결과가 계속 차지하는 메모리(바이트) 측정, 결과도 반환"""
+    best, result = time_call(func, repeat)
+    peak = retained = None
+    if memory:
+        tracemalloc.start()
+        try:
+            kept = func()
+            retained, peak = tracemalloc.get_traced_memory()
+            del kept
+        finally:
+            tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak, "retained_bytes": retained, "result": result}
+
+
+def quiet(func):
+    """stdout 출력을 버리는 래퍼 (save_index, load_sets 진행 메시지)"""
+    def wrapper(*args, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def run_suite(scale: int, workdir: Path, repeat: int = 3, memory: bool = True,
+              depth: int = DEFAULT_DEPTH) -> dict:
+    """한 규모에서 모든 단계 실행"""
+    from install_template_set import (
+        compile_sets, list_sets, load_sets, resolve_set, sets_cache_path
+    )
+
+    tree = workdir / f"tree-{scale}"
+    if not (tree / COMPONENTS_PATH).exists():
+        print(f"Generating {scale} templates...", flush=True)
+        generate_tree(tree, scale, subdirs=max(40, scale // 500), max_body=400)
+
+    stages = {}
+
+    stages["scan"] = measure(lambda: scan_categories(tree, CATEGORIES), repeat, memory)
+    categories = stages["scan"]["result"]
+    # 체크아웃에 git 정보가 없으므로 모든 파일을 읽어 해시 (sync 의 최악의 경우)
+    stages["hash_templates"] = measure(lambda: hash_templates(tree, categories), repeat, memory)
+    index = {"version": "1.0", "updated_at": "bench", "categories": categories}
+
+    index_path = workdir / f"index-{scale}.json"
+
+    def save_fresh():
+        # 기존 파일이 있으면 변경 없음으로 판단해 쓰기를 건너뛰므로 매번 지움
+        index_path.unlink(missing_ok=True)
+        return quiet(save_index)(dict(index), str(index_path))
+
+    stages["save_index"] = measure(save_fresh, repeat, memory)
+    stages["load_index"] = measure(lambda: load_index(str(index_path)), repeat, memory)
+
+    stages["load_index_compact"] = measure(
+        lambda: load_index(str(index_path), compact=True), repeat, memory
+    )
+
+    loaded = stages["load_index"]["result"]
+    compact = stages["load_index_compact"]["result"]
+    ngram = load_sidecar(str(index_path), "ngram", loaded)
+    stages["search_templates"] = measure(
+        lambda: [search_templates(q, loaded, ngram) for q in SEARCH_QUERIES], repeat, memory
+    )
+    # n-gram 없이 전체 순회 (view 를 통한 접근 비용)
+    stages["search_scan"] = measure(
+        lambda: [search_templates(q, loaded) for q in SEARCH_QUERIES], repeat, memory
+    )
+    stages["search_scan_compact"] = measure(
+        lambda: [search_templates(q, compact) for q in SEARCH_QUERIES], repeat, memory
+    )
+    stages["resolve_tags"] = measure(
+        lambda: [resolve_tags([tag]) for tag in TAG_MAPPINGS for _ in range(100)], repeat, memory
+    )
+
+    sets_path = workdir / f"template-sets-{scale}-d{depth}.yaml"
+    if not sets_path.exists():
+        generate_sets(sets_path, loaded, sets=max(200, min(2000, scale // 50)), depth=depth)
+
+    def load_sets_cold():
+        # 컴파일 캐시를 지워 YAML 파싱 + 상속 그래프 해석을 매번 측정
+        sets_cache_path(str(sets_path)).unlink(missing_ok=True)
+        return quiet(load_sets)(str(sets_path))
+
+    stages["load_sets"] = measure(load_sets_cold, repeat, memory)
+    sets_data = stages["load_sets"]["result"]
+    stages["load_sets_cached"] = measure(lambda: quiet(load_sets)(str(sets_path)), repeat, memory)
+    stages["compile_sets"] = measure(lambda: compile_sets(sets_data), repeat, memory)
+    stages["resolve_set"] = measure(
+        lambda: [resolve_set(sets_data, name) for name in sets_data["sets"]], repeat, memory
+    )
+    stages["list_sets"] = measure(lambda: quiet(list_sets)(str(sets_path)), repeat, memory)
+
+    for stage in stages.values():
+        stage.pop("result", None)
+    return stages
+
+
+def compare_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """기준값 대비 회귀한 (규모, 단계, 현재, 기준) 목록"""
+    regressions = []
+    for scale, stages in results.items():
+        for stage, data in stages.items():
+            base = baseline.get(scale, {}).get(stage)
+            if not base:
+                continue
+            limit = base["seconds"] * (1 + tolerance)
+            if data["seconds"] > limit and data["seconds"] - base["seconds"] > MIN_REGRESSION_SECONDS:
+                regressions.append((scale, stage, data["seconds"], base["seconds"]))
+    return regressions
+
+
+def print_report(results: dict, baseline: dict = None):
+    """단계별 결과 표 출력"""
+    print(f"\n{'Scale':>8} {'Stage':<20} {'Wall (s)':>10} {'Peak MiB':>10} {'Kept MiB':>10}"
+          f" {'Baseline':>10}")
+    print("-" * 73)
+    for scale, stages in results.items():
+        for stage, data in stages.items():
+            peak = data.get("peak_bytes")
+            peak_text = f"{peak / 1048576:>10.1f}" if peak is not None else f"{'-':>10}"
+            kept = data.get("retained_bytes")
+            kept_text = f"{kept / 1048576:>10.1f}" if kept is not None else f"{'-':>10}"
+            base = (baseline or {}).get(scale, {}).get(stage)
+            base_text = f"{base['seconds']:>10.4f}" if base else f"{'-':>10}"
+            print(f"{scale:>8} {stage:<20} {data['seconds']:>10.4f} {peak_text} {kept_text} {base_text}")
+
+
+def time_call(func, repeat: int):
+    """최소 실행 시간과 마지막 결과 반환"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_scan(base_path: Path, repeat: int, workers: int = None) -> dict:
+    """기존 스캐너와 병렬 스캐너 비교"""
+    def legacy():
+        return {c: scan_category(base_path, c) for c in CATEGORIES}
+
+    def parallel():
+        return scan_categories(base_path, CATEGORIES, workers=workers)
+
+    # 페이지 캐시 워밍업
+    legacy()
+
+    legacy_time, legacy_result = time_call(legacy, repeat)
+    parallel_time, parallel_result = time_call(parallel, repeat)
+
+    legacy_bytes = json.dumps(legacy_result, indent=2, ensure_ascii=False).encode("utf-8")
+    parallel_bytes = json.dumps(parallel_result, indent=2, ensure_ascii=False).encode("utf-8")
+
+    return {
+        "legacy": legacy_time,
+        "parallel": parallel_time,
+        "speedup": legacy_time / parallel_time if parallel_time else 0.0,
+        "identical": legacy_bytes == parallel_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark AITMPL sync, search and set resolution on synthetic catalogs",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                     # 10k and 50k templates
+  %(prog)s -s 1000 50000 200000 --no-memory    # Bigger catalogs, timings only
+  %(prog)s --save-baseline bench-baseline.json # Record a baseline
+  %(prog)s --baseline bench-baseline.json      # Fail on regressions (>50%% slower)
+  %(prog)s --compare-scanners -n 100000 -w 16  # scan_category vs scan_categories
+        """
+    )
+    parser.add_argument("-s", "--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Catalog sizes (number of templates) to benchmark")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Runs per stage (best time is reported)")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                        help="Length of the extends chains in the synthetic sets")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument("--workdir", help="Directory for generated trees (kept after the run)")
+    parser.add_argument("--baseline", help="Fail if a stage is slower than this baseline file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown against the baseline (0.5 = 50%%)")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write results as a new baseline")
+    parser.add_argument("--compare-scanners", action="store_true",
+                        help="Only compare the legacy and parallel scanners")
+    parser.add_argument("-n", "--templates", type=int, default=20000,
+                        help="Templates for --compare-scanners")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Worker threads for the parallel scanner (--compare-scanners)")
+    parser.add_argument("--tree", help="Directory for the --compare-scanners tree (kept after the run)")
+
+    args = parser.parse_args()
+
+    if args.compare_scanners:
+        compare_scanners(args)
+        return
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="aitmpl_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        results = {}
+        for scale in args.scales:
+            results[str(scale)] = run_suite(
+                scale, workdir, args.repeat, not args.no_memory, args.depth
+            )
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[REGRESSION] {len(regressions)} stages slower than baseline +{args.tolerance:.0%}:")
+            for scale, stage, current, base in regressions:
+                print(f"  {scale:>8} {stage:<18} {current:.4f}s (baseline {base:.4f}s)")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+def compare_scanners(args):
+    """기존 스캐너와 병렬 스캐너 비교"""
+    base_path = Path(args.tree) if args.tree else Path(tempfile.mkdtemp(prefix="aitmpl_bench_"))
+    try:
+        if not (base_path / COMPONENTS_PATH).exists():
+            print(f"Generating {args.templates} templates in {base_path}...")
+            generate_tree(base_path, args.templates)
+
+        result = bench_scan(base_path, args.repeat, args.workers)
+
+        print(f"\n{'Scanner':<20} {'Best (s)':>10}")
+        print("-" * 32)
+        print(f"{'scan_category':<20} {result['legacy']:>10.3f}")
+        print(f"{'scan_categories':<20} {result['parallel']:>10.3f}")
+        print(f"\nSpeedup: {result['speedup']:.2f}x")
+        print(f"Byte-identical output: {'yes' if result['identical'] else 'NO'}")
+
+        if not result["identical"]:
+            sys.exit(1)
+    finally:
+        if not args.tree:
+            shutil.rmtree(base_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
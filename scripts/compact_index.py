@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+AITMPL 압축 인덱스
+템플릿마다 dict 를 두는 대신 문자열 테이블 + array 열로 메모리에 유지
+
+  strings       카테고리/서브카테고리/이름/파일 문자열 (한 번만 저장)
+  열            category, subcategory, name, file (문자열 id), size
+  hashes        템플릿 git blob id 를 20바이트씩 이어 붙인 bytearray (없으면 0)
+  rows_by_key   (category, subcategory, name) -> 행 번호 (O(1) 조회)
+
+기존 코드는 그대로 index["categories"][cat][subcat][i] 로 읽을 수 있음
+(읽기 전용 view, 템플릿 dict 는 접근할 때 만들어짐)
+"""
+
+from array import array
+from collections.abc import Mapping, Sequence
+
+TEMPLATE_FIELDS = ("name", "file", "size")
+# file 이 이름 + 접미사인 경우 문자열 대신 음수 코드로 저장 (-1 -> ".md" ...)
+FILE_SUFFIXES = (".md", ".json", "/SKILL.md")
+ID_BITS = 21
+HASH_BYTES = 20
+
+
+def _pack_hash(value) -> bytes:
+    """40자리 16진수 blob id 를 20바이트로 (다른 형식이면 None -> extras 에 그대로 저장)"""
+    if not isinstance(value, str) or len(value) != 2 * HASH_BYTES:
+        return None
+    try:
+        digest = bytes.fromhex(value)
+    except ValueError:
+        return None
+    return digest if any(digest) and digest.hex() == value else None
+
+
+class StringTable:
+    """문자열 <-> id (같은 문자열은 한 번만 저장)"""
+
+    __slots__ = ("strings", "ids")
+
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def intern(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class CompactIndex(Mapping):
+    """load_index 결과와 같은 키를 가진 읽기 전용 압축 인덱스"""
+
+    def __init__(self, meta: dict = None):
+        self.meta = dict(meta or {})
+        self.meta.pop("categories", None)
+        self.order = list(self.meta)
+        if "summary" in self.order:
+            self.order.insert(self.order.index("summary"), "categories")
+        else:
+            self.order.append("categories")
+
+        self.strings = StringTable()
+        self.category_ids = array("I")
+        self.subcategory_ids = array("I")
+        self.name_ids = array("I")
+        self.file_ids = array("i")
+        self.sizes = array("q")
+        self.hashes = bytearray()
+        self.extras = {}   # 필드 -> {행: 값} (source, hash 등 선택 필드)
+        self.groups = {}   # 카테고리 -> {서브카테고리: (첫 행, 끝 행)}
+        self.rows_by_key = {}
+
+    @classmethod
+    def from_index(cls, index: dict) -> "CompactIndex":
+        """dict 인덱스에서 생성"""
+        compact = cls(index)
+        for category, subcats in index.get("categories", {}).items():
+            compact.groups.setdefault(category, {})
+            for subcat, templates in subcats.items():
+                for tmpl in templates:
+                    compact.append(category, subcat, tmpl)
+        return compact
+
+    @classmethod
+    def from_rows(cls, meta: dict, rows) -> "CompactIndex":
+        """(category, subcategory, template dict) 행에서 생성 (서브카테고리별로 연속이어야 함)"""
+        compact = cls(meta)
+        for category, subcat, tmpl in rows:
+            compact.append(category, subcat, tmpl)
+        return compact
+
+    def append(self, category: str, subcat: str, tmpl: dict):
+        """템플릿 한 행 추가"""
+        row = len(self.sizes)
+        intern = self.strings.intern
+        category_id, subcat_id, name_id = intern(category), intern(subcat), intern(tmpl["name"])
+        if max(category_id, subcat_id, name_id) >= 1 << ID_BITS:
+            # 키를 ID_BITS 씩 묶으므로 더 큰 id 는 다른 키와 충돌함
+            raise ValueError(f"too many distinct strings for a compact index (max {1 << ID_BITS})")
+
+        file = tmpl.get("file", "")
+        file_id = None
+        for code, suffix in enumerate(FILE_SUFFIXES):
+            if file == tmpl["name"] + suffix:
+                file_id = -1 - code
+                break
+        if file_id is None:
+            file_id = intern(file)
+
+        self.category_ids.append(category_id)
+        self.subcategory_ids.append(subcat_id)
+        self.name_ids.append(name_id)
+        self.file_ids.append(file_id)
+        self.sizes.append(tmpl.get("size", 0))
+        digest = _pack_hash(tmpl.get("hash"))
+        if digest is not None:
+            # 해시가 없는 앞 행은 0 으로 채움
+            self.hashes.extend(bytes(HASH_BYTES * row - len(self.hashes)))
+            self.hashes.extend(digest)
+        for field, value in tmpl.items():
+            if field not in TEMPLATE_FIELDS and (field != "hash" or digest is None):
+                self.extras.setdefault(field, {})[row] = (
+                    self.strings[intern(value)] if isinstance(value, str) else value
+                )
+
+        subcats = self.groups.setdefault(category, {})
+        start, _ = subcats.get(subcat, (row, row))
+        subcats[subcat] = (start, row + 1)
+        self.rows_by_key.setdefault(self._pack(category_id, subcat_id, name_id), row)
+
+    @staticmethod
+    def _pack(category_id: int, subcat_id: int, name_id: int) -> int:
+        return (category_id << (2 * ID_BITS)) | (subcat_id << ID_BITS) | name_id
+
+    def find(self, category: str, subcat: str, name: str) -> int:
+        """(카테고리, 서브카테고리, 이름) 의 행 번호 (없으면 None)"""
+        ids = self.strings.ids
+        category_id, subcat_id, name_id = ids.get(category), ids.get(subcat), ids.get(name)
+        if category_id is None or subcat_id is None or name_id is None:
+            return None
+        return self.rows_by_key.get(self._pack(category_id, subcat_id, name_id))
+
+    def lookup(self, category: str, subcat: str, name: str) -> dict:
+        """템플릿 dict (없으면 None)"""
+        row = self.find(category, subcat, name)
+        return None if row is None else self.template(row)
+
+    def template(self, row: int) -> dict:
+        """행 하나를 인덱스 파일과 같은 템플릿 dict 로"""
+        name = self.strings[self.name_ids[row]]
+        file_id = self.file_ids[row]
+        file = self.strings[file_id] if file_id >= 0 else name + FILE_SUFFIXES[-1 - file_id]
+        tmpl = {"name": name, "file": file, "size": self.sizes[row]}
+        digest = self.hashes[HASH_BYTES * row:HASH_BYTES * (row + 1)]
+        if any(digest):
+            tmpl["hash"] = digest.hex()
+        for field, values in self.extras.items():
+            if row in values:
+                tmpl[field] = values[row]
+        return tmpl
+
+    def entries(self):
+        """(카테고리, 서브카테고리, 이름) 을 인덱스 순서대로 (dict 를 만들지 않음)"""
+        strings = self.strings.strings
+        for category_id, subcat_id, name_id in zip(
+            self.category_ids, self.subcategory_ids, self.name_ids
+        ):
+            yield strings[category_id], strings[subcat_id], strings[name_id]
+
+    @property
+    def template_count(self) -> int:
+        return len(self.sizes)
+
+    def to_dict(self) -> dict:
+        """load_index 와 같은 dict 인덱스로 복원"""
+        return {
+            key: (
+                {category: {subcat: list(templates) for subcat, templates in subcats.items()}
+                 for category, subcats in self["categories"].items()}
+                if key == "categories" else self.meta[key]
+            )
+            for key in self.order
+        }
+
+    # Mapping: 최상위 키 (version, updated_at, ..., categories, summary)
+    def __getitem__(self, key):
+        if key == "categories":
+            return CategoriesView(self)
+        return self.meta[key]
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+
+class CategoriesView(Mapping):
+    """index["categories"]: 카테고리 -> 서브카테고리 view"""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: CompactIndex):
+        self.index = index
+
+    def __getitem__(self, category: str):
+        return SubcategoriesView(self.index, self.index.groups[category])
+
+    def __iter__(self):
+        return iter(self.index.groups)
+
+    def __len__(self) -> int:
+        return len(self.index.groups)
+
+
+class SubcategoriesView(Mapping):
+    """index["categories"][cat]: 서브카테고리 -> 템플릿 목록 view"""
+
+    __slots__ = ("index", "groups")
+
+    def __init__(self, index: CompactIndex, groups: dict):
+        self.index = index
+        self.groups = groups
+
+    def __getitem__(self, subcat: str):
+        start, end = self.groups[subcat]
+        return TemplateRows(self.index, start, end)
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+
+class TemplateRows(Sequence):
+    """서브카테고리의 템플릿 목록 (연속된 행 범위)"""
+
+    __slots__ = ("index", "start", "end")
+
+    def __init__(self, index: CompactIndex, start: int, end: int):
+        self.index = index
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, i):
+        rows = range(self.start, self.end)[i]
+        if isinstance(rows, range):
+            return [self.index.template(row) for row in rows]
+        return self.index.template(rows)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
@@ -4,8 +4,17 @@
 .claude/template-sets.yaml에서 정의된 세트를 한번에 설치
 """
 
+import difflib
+import hashlib
+import json
+import os
 import subprocess
+import sys
 import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
 try:
@@ -14,149 +23,834 @@ except ImportError:
     print("PyYAML required. Install with: pip install pyyaml")
     exit(1)
 
+from template_store import (
+    FILE_CATEGORIES, STORE_DIR, git_blob_id, install_native, installed_file, load_manifest,
+    locate_installed, native_files
+)
+from search_aitmpl import (
+    INDEX_FILE, index_entries, is_sqlite_store, load_index, open_store, split_template_path,
+    store_entries, store_get_template, store_meta, tag_path
+)
+
 SETS_FILE = ".claude/template-sets.yaml"
+LEDGER_FILE = ".claude/aitmpl-installed.json"
+JOURNAL_FILE = ".claude/aitmpl-install-journal.jsonl"
 
+# 실패한 npx 설치 재시도 (대기 시간은 RETRY_BACKOFF 초부터 두 배씩)
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 2.0
 
-def load_sets(sets_path: str = None) -> dict:
-    """템플릿 세트 정의 로드"""
+TYPE_MAP = {
+    "agents": "agent",
+    "commands": "command",
+    "hooks": "hook",
+    "mcps": "mcp",
+    "skills": "skill",
+    "settings": "setting",
+}
+
+# .claude/settings.json, .mcp.json 을 병합하는 카테고리 - 동시에 실행하면 서로 덮어씀
+SHARED_CONFIG_CATEGORIES = ("hooks", "mcps", "settings")
+
+PRINT_LOCK = threading.Lock()
+
+
+def sets_cache_path(sets_path: str) -> Path:
+    """컴파일된 세트 캐시 경로 (template-sets.compiled.json)"""
+    path = Path(sets_path)
+    return path.with_name(f"{path.stem}.compiled.json")
+
+
+def _json_safe(data) -> bool:
+    """JSON 으로 저장했다 읽어도 같은 값인지 (날짜, 정수 키 등은 타입이 바뀜)"""
+    try:
+        return json.loads(json.dumps(data, ensure_ascii=False)) == data
+    except (TypeError, ValueError):
+        return False
+
+
+def load_compiled_sets(sets_path: str = None) -> dict:
+    """세트 정의를 로드하고 전체 상속 그래프를 한 번에 해석
+
+    {"data": YAML 내용, "resolved": {세트: 템플릿}, "errors": {세트: 순환 참조 메시지}}.
+    순환 참조가 있는 세트만 errors 에 들어가고 나머지 세트는 그대로 사용 가능.
+    결과는 YAML 파일의 mtime/크기, 다음으로 sha256 을 키로 캐시되어
+    파일이 바뀌지 않았으면 YAML 파싱도 건너뜀. JSON 으로 그대로 저장할 수 없는
+    YAML (날짜, 정수 키 등) 은 캐시하지 않음
+    """
     if sets_path is None:
         sets_path = SETS_FILE
 
     path = Path(sets_path)
     if not path.exists():
         print(f"Error: {sets_path} not found")
+        return None
+
+    stat = path.stat()
+    cache_path = sets_cache_path(sets_path)
+    cache = None
+    if cache_path.exists():
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            cache = None
+        if not isinstance(cache, dict) or "errors" not in cache:
+            cache = None  # 예전 형식
+
+    if cache and cache.get("mtime_ns") == stat.st_mtime_ns and cache.get("size") == stat.st_size:
+        return cache
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cache and cache.get("sha256") == digest:
+        # 내용은 같고 mtime 만 바뀜 (checkout, touch)
+        compiled = cache
+    else:
+        data = yaml.safe_load(raw) or {}
+        errors = {}
+        resolved = compile_sets(data, errors=errors)
+        compiled = {"data": data, "resolved": resolved, "errors": errors, "sha256": digest}
+        if not _json_safe(compiled):
+            return compiled
+
+    compiled["mtime_ns"] = stat.st_mtime_ns
+    compiled["size"] = stat.st_size
+    try:
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(compiled, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # 캐시는 선택 사항
+
+    return compiled
+
+
+def load_sets(sets_path: str = None) -> dict:
+    """템플릿 세트 정의 로드"""
+    compiled = load_compiled_sets(sets_path)
+    if compiled is None:
         return {}
+    return compiled["data"]
 
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
 
+def compile_sets(sets_data: dict, roots: list = None, errors: dict = None) -> dict:
+    """세트 상속 그래프를 위상 순서로 한 번씩 해석 (공통 조상은 한 번만 계산)
 
-def resolve_set(sets_data: dict, set_name: str, resolved: set = None) -> dict:
-    """세트 확장 (extends 처리, 순환 참조 방지)"""
-    if resolved is None:
-        resolved = set()
+    roots 가 주어지면 그 세트들과 조상만 해석. 순환 참조는 ValueError,
+    errors 가 주어지면 대신 순환을 포함하는 세트마다 {세트: 메시지} 로 기록하고
+    나머지 세트는 계속 해석
+    """
+    sets = sets_data.get("sets") or {}
+    resolved = {}
+    failed = {} if errors is None else errors
 
-    if set_name in resolved:
-        return {}  # 순환 참조 방지
+    for root in (roots if roots is not None else list(sets)):
+        if root in resolved or root in failed:
+            continue
+        # 깊은 extends 체인에서도 재귀 한도에 걸리지 않도록 명시적 스택 사용
+        stack = [(root, iter((sets.get(root) or {}).get("extends", [])))]
+        visiting = {root}
+        while stack:
+            name, parents = stack[-1]
+            error = None
+            for parent in parents:
+                if parent in resolved:
+                    continue
+                if parent in failed:
+                    error = failed[parent]
+                elif parent in visiting:
+                    chain = [n for n, _ in stack]
+                    cycle = chain[chain.index(parent):] + [parent]
+                    error = f"Circular extends: {' -> '.join(cycle)}"
+                else:
+                    visiting.add(parent)
+                    stack.append((parent, iter((sets.get(parent) or {}).get("extends", []))))
+                break
+            else:
+                stack.pop()
+                visiting.discard(name)
+                set_def = sets.get(name) or {}
+                result = {key: list(set_def.get(key, [])) for key in TYPE_MAP}
+                for parent in set_def.get("extends", []):
+                    for key in result:
+                        result[key].extend(resolved[parent][key])
+                # 중복 제거 (순서 유지)
+                for key in result:
+                    result[key] = list(dict.fromkeys(result[key]))
+                resolved[name] = result
+                continue
 
-    resolved.add(set_name)
+            if error is not None:
+                if errors is None:
+                    raise ValueError(error)
+                # 스택의 모든 세트가 순환에 이르는 extends 를 가짐
+                for n, _ in stack:
+                    failed[n] = error
+                break
 
-    set_def = sets_data.get("sets", {}).get(set_name, {})
-    result = {
-        "agents": list(set_def.get("agents", [])),
-        "commands": list(set_def.get("commands", [])),
-        "hooks": list(set_def.get("hooks", [])),
-        "mcps": list(set_def.get("mcps", [])),
-        "skills": list(set_def.get("skills", [])),
-        "settings": list(set_def.get("settings", [])),
-    }
+    return resolved
 
-    # extends 처리
-    for parent in set_def.get("extends", []):
-        parent_result = resolve_set(sets_data, parent, resolved.copy())
-        for key in result:
-            result[key].extend(parent_result.get(key, []))
 
-    # 중복 제거 (순서 유지)
-    for key in result:
-        result[key] = list(dict.fromkeys(result[key]))
+def resolve_set(sets_data: dict, set_name: str) -> dict:
+    """세트 확장 (extends 처리, 순환 참조는 ValueError)"""
+    return compile_sets(sets_data, [set_name])[set_name]
 
-    return result
 
+def merge_resolved(resolved: list) -> dict:
+    """여러 세트의 해석 결과를 하나로 합침 (카테고리별 중복 제거, 순서 유지)"""
+    merged = {key: [] for key in TYPE_MAP}
+    for templates in resolved:
+        for key, items in templates.items():
+            merged.setdefault(key, []).extend(items)
+    return {key: list(dict.fromkeys(items)) for key, items in merged.items()}
 
-def generate_install_commands(templates: dict) -> list:
-    """설치 명령어 생성"""
-    commands = []
-
-    type_map = {
-        "agents": "agent",
-        "commands": "command",
-        "hooks": "hook",
-        "mcps": "mcp",
-        "skills": "skill",
-        "settings": "setting",
-    }
+
+def plan_install_jobs(templates: dict, batch: bool = False) -> list:
+    """설치 작업 목록 생성 [(category, items, command)]
+
+    batch=True 이면 카테고리별로 항목을 쉼표로 묶어 npx 실행 횟수를 줄임
+    """
+    jobs = []
 
     for category, items in templates.items():
         if items:
-            cmd_type = type_map.get(category, category)
-            for item in items:
-                commands.append(f"npx claude-code-templates@latest --{cmd_type} {item}")
+            cmd_type = TYPE_MAP.get(category, category)
+            if batch:
+                jobs.append((
+                    category, list(items),
+                    f"npx claude-code-templates@latest --{cmd_type} {','.join(items)}"
+                ))
+            else:
+                for item in items:
+                    jobs.append((
+                        category, [item],
+                        f"npx claude-code-templates@latest --{cmd_type} {item}"
+                    ))
 
-    return commands
+    return jobs
 
 
-def install_set(set_name: str, sets_path: str = None, dry_run: bool = False):
-    """템플릿 세트 설치"""
-    sets_data = load_sets(sets_path)
-    if not sets_data:
-        return
+def generate_install_commands(templates: dict, batch: bool = False) -> list:
+    """설치 명령어 생성"""
+    return [cmd for _, _, cmd in plan_install_jobs(templates, batch)]
 
-    if set_name not in sets_data.get("sets", {}):
-        print(f"Error: Set '{set_name}' not found")
-        available = list(sets_data.get("sets", {}).keys())
-        print(f"Available sets: {', '.join(available)}")
-        return
 
-    set_def = sets_data["sets"][set_name]
-    print(f"\n[Installing template set: {set_name}]")
-    print(f"   {set_def.get('description', '')}\n")
+def _job_label(category: str, items: list) -> str:
+    """출력 줄 앞에 붙일 작업 이름"""
+    label = f"{TYPE_MAP.get(category, category)}:{items[0]}"
+    if len(items) > 1:
+        label += f" +{len(items) - 1}"
+    return label
 
-    templates = resolve_set(sets_data, set_name)
-    commands = generate_install_commands(templates)
 
-    if not commands:
-        print("No templates to install.")
-        return
+def _say(message: str):
+    """여러 작업의 출력이 섞이지 않도록 줄 단위로 출력"""
+    with PRINT_LOCK:
+        print(message, flush=True)
 
-    print(f"Templates to install ({len(commands)}):")
-    for cmd in commands:
-        # Extract the template path from command
-        parts = cmd.split("--")[1].strip().split(" ", 1)
-        if len(parts) == 2:
-            print(f"  - {parts[0]}: {parts[1]}")
 
-    if dry_run:
-        print("\n[DRY RUN] Commands that would be executed:")
-        for cmd in commands:
-            print(f"  {cmd}")
+def run_install_job(job: tuple) -> bool:
+    """설치 명령 하나 실행 (출력을 작업 이름과 함께 실시간 출력)"""
+    category, items, cmd = job
+    label = _job_label(category, items)
+    _say(f"\n> {cmd}")
+
+    try:
+        proc = subprocess.Popen(
+            cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1
+        )
+    except OSError as e:
+        _say(f"  [FAILED] [{label}] {e}")
+        return False
+
+    for line in proc.stdout:
+        _say(f"  [{label}] {line.rstrip()}")
+
+    returncode = proc.wait()
+    if returncode != 0:
+        _say(f"  [FAILED] [{label}] exit status {returncode}")
+        return False
+    return True
+
+
+def run_install_jobs(jobs: list, max_workers: int = 1, run_job=None) -> tuple:
+    """설치 작업 실행 (최대 max_workers개 동시 실행), (성공 수, 실패 수, 성공한 작업) 반환
+
+    공유 설정 파일을 수정하는 카테고리는 하나의 직렬 레인에서 순서대로 실행.
+    run_job 으로 작업 하나를 실행하는 함수를 바꿀 수 있음 (기본 run_install_job)
+    """
+    run_job = run_job or run_install_job
+
+    def run_lane(lane: list) -> list:
+        return [(job, run_job(job)) for job in lane]
+
+    if max_workers <= 1:
+        outcomes = run_lane(jobs)
+    else:
+        serial = [job for job in jobs if job[0] in SHARED_CONFIG_CATEGORIES]
+        lanes = [serial] if serial else []
+        lanes += [[job] for job in jobs if job[0] not in SHARED_CONFIG_CATEGORIES]
+
+        outcomes = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for lane_outcomes in pool.map(run_lane, lanes):
+                outcomes.extend(lane_outcomes)
+
+    succeeded = [job for job, ok in outcomes if ok]
+    success_count = sum(len(job[1]) for job in succeeded)
+    fail_count = sum(len(job[1]) for job, ok in outcomes if not ok)
+    return success_count, fail_count, succeeded
+
+
+def plan_native_installs(templates: dict, manifest: dict) -> tuple:
+    """로컬 저장소에 있는 템플릿과 npx 로 설치할 템플릿 분리 -> (native, npx)"""
+    native = {category: [] for category in templates}
+    remaining = {category: [] for category in templates}
+    for category, items in templates.items():
+        for item in items:
+            if manifest and native_files(manifest, category, item):
+                native[category].append(item)
+            else:
+                remaining[category].append(item)
+    return native, remaining
+
+
+def run_native_installs(native: dict, manifest: dict, store_dir: str = None,
+                        journal: "InstallJournal" = None) -> tuple:
+    """저장소에서 바로 설치, (성공한 작업 [(category, [item], "native")], 실패해 npx 로 넘길 템플릿)"""
+    succeeded = []
+    fallback = {category: [] for category in native}
+    for category, items in native.items():
+        for item in items:
+            key = native_job_key(category, item)
+            if journal:
+                journal.mark(key, "started", attempt=1)
+            start = time.perf_counter()
+            ok = manifest is not None and install_native(category, item, manifest, store_dir)
+            seconds = round(time.perf_counter() - start, 3)
+            if ok:
+                _say(f"  [native] {TYPE_MAP.get(category, category)}:{item}")
+                succeeded.append((category, [item], "native"))
+            else:
+                _say(f"  [native] {TYPE_MAP.get(category, category)}:{item} failed, using npx")
+                fallback[category].append(item)
+            if journal:
+                journal.mark(key, "succeeded" if ok else "fallback", seconds=seconds)
+    return succeeded, fallback
+
+
+def native_job_key(category: str, item: str) -> str:
+    """저널에서 네이티브 설치 작업을 가리키는 키 (npx 작업은 명령어 자체)"""
+    return f"native {category}/{item}"
+
+
+class InstallJournal:
+    """설치 실행 저널 (write-ahead, 작업 상태가 바뀔 때마다 JSON 한 줄 추가 후 fsync)
+
+    이벤트: run (세트/인덱스 항목/커밋), planned, started, succeeded, failed, fallback
+    (네이티브 설치 실패, 아직 설치되지 않음), replaced (fallback 을 대신할 npx 작업이 계획됨).
+    중단되거나 실패한 실행은 --resume 으로 이어서 진행
+    """
+
+    FINISHED = ("succeeded", "replaced")
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or JOURNAL_FILE)
+        self.lock = threading.Lock()
+        self.run = {}
+        self.jobs = {}       # 키 -> {"category", "items", "cmd", "state", "attempts", "seconds"}
+        self.durations = {}  # 이번 실행에서 걸린 시간 (키 -> 초, 재시도 포함)
+
+    @classmethod
+    def load(cls, path: str = None) -> "InstallJournal":
+        """저널 다시 읽기 (없으면 None, 중간에 끊긴 마지막 줄은 무시)"""
+        journal = cls(path)
+        if not journal.path.exists():
+            return None
+        with open(journal.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    journal._apply(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return journal if journal.run else None
+
+    def start(self, sets: list, entries: dict, commit: str):
+        """새 실행 시작 (이전 저널을 덮어씀)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("", encoding="utf-8")
+        self.run, self.jobs, self.durations = {}, {}, {}
+        self._append({"event": "run", "sets": sets, "entries": entries or {}, "commit": commit,
+                      "started_at": datetime.now().isoformat()})
+
+    def plan(self, category: str, items: list, cmd: str) -> str:
+        key = native_job_key(category, items[0]) if cmd == "native" else cmd
+        self._append({"event": "planned", "key": key, "category": category,
+                      "items": list(items), "cmd": cmd})
+        return key
+
+    def mark(self, key: str, state: str, **fields):
+        self._append({"event": state, "key": key, **fields})
+
+    def pending(self) -> list:
+        """끝나지 않은 작업 [(key, job)] (계획 순서)"""
+        return [(key, job) for key, job in self.jobs.items() if job["state"] not in self.FINISHED]
+
+    def succeeded(self) -> list:
+        """성공한 작업 [(category, items, cmd)] (record_installs 형식)"""
+        return [
+            (job["category"], job["items"], job["cmd"])
+            for job in self.jobs.values() if job["state"] == "succeeded"
+        ]
+
+    def _append(self, event: dict):
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(event)
+            if "seconds" in event:
+                self.durations[event["key"]] = self.durations.get(event["key"], 0) + event["seconds"]
+
+    def _apply(self, event: dict):
+        kind = event.get("event")
+        if kind == "run":
+            self.run = event
+        elif kind == "planned":
+            self.jobs[event["key"]] = {
+                "category": event["category"], "items": event["items"], "cmd": event["cmd"],
+                "state": "planned", "attempts": 0, "seconds": 0,
+            }
+        elif event.get("key") in self.jobs:
+            job = self.jobs[event["key"]]
+            job["state"] = kind
+            job["attempts"] = max(job["attempts"], event.get("attempt", 0))
+            job["seconds"] += event.get("seconds", 0)
+
+
+def run_job_with_retries(job: tuple, journal: InstallJournal, retries: int = DEFAULT_RETRIES) -> bool:
+    """저널에 기록하며 npx 작업 실행, 실패하면 대기 시간을 두 배씩 늘리며 재시도"""
+    category, items, cmd = job
+    previous = journal.jobs[cmd]["attempts"] if cmd in journal.jobs else 0  # --resume 이전 시도 포함
+    for retry in range(retries + 1):
+        attempt = previous + retry + 1
+        if retry:
+            delay = RETRY_BACKOFF * 2 ** (retry - 1)
+            _say(f"  [retry] [{_job_label(category, items)}] attempt {attempt} in {delay:.0f}s")
+            time.sleep(delay)
+        journal.mark(cmd, "started", attempt=attempt)
+        start = time.perf_counter()
+        ok = run_install_job(job)
+        journal.mark(cmd, "succeeded" if ok else "failed", attempt=attempt,
+                     seconds=round(time.perf_counter() - start, 3))
+        if ok:
+            return True
+    return False
+
+
+def run_journal(journal: InstallJournal, manifest: dict, store_dir: str = None,
+                max_workers: int = 1, batch: bool = False,
+                retries: int = DEFAULT_RETRIES) -> tuple:
+    """저널에서 끝나지 않은 작업 실행, (성공 수, 실패 수) 반환"""
+    pending = journal.pending()
+    native = {}
+    fallback = {}  # 이전 실행에서 네이티브 설치가 실패했지만 npx 작업은 계획되지 않은 템플릿
+    install_jobs = []
+    for _, job in pending:
+        if job["cmd"] != "native":
+            install_jobs.append((job["category"], job["items"], job["cmd"]))
+        elif job["state"] == "fallback":
+            fallback.setdefault(job["category"], []).extend(job["items"])
+        else:
+            native.setdefault(job["category"], []).extend(job["items"])
+
+    success_count = fail_count = 0
+    if native:
+        native_total = sum(len(items) for items in native.values())
+        print(f"\n>> Installing {native_total} templates from local store...")
+        succeeded, failed = run_native_installs(native, manifest, store_dir, journal)
+        success_count += len(succeeded)
+        for category, items in failed.items():
+            fallback.setdefault(category, []).extend(items)
+
+    # 저장소로 설치할 수 없던 템플릿은 npx 로. npx 작업을 먼저 기록한 뒤에야 fallback 을
+    # 끝난 것으로 표시하므로, 그 사이에 중단되어도 --resume 이 다시 npx 작업을 계획함
+    for job in plan_install_jobs(fallback, batch):
+        journal.plan(*job)
+        install_jobs.append(job)
+    for category, items in fallback.items():
+        for item in items:
+            journal.mark(native_job_key(category, item), "replaced")
+
+    if install_jobs:
+        print(f"\n>> Installing... ({len(install_jobs)} commands, {max(1, max_workers)} at a time)")
+        npx_success, fail_count, _ = run_install_jobs(
+            install_jobs, max_workers, lambda job: run_job_with_retries(job, journal, retries)
+        )
+        success_count += npx_success
+
+    return success_count, fail_count
+
+
+def print_durations(journal: InstallJournal):
+    """이번 실행의 작업별 소요 시간 (느린 순)"""
+    if not journal.durations:
         return
+    print("\nDurations (slowest first):")
+    for key, seconds in sorted(journal.durations.items(), key=lambda kv: -kv[1]):
+        job = journal.jobs[key]
+        label = _job_label(job["category"], job["items"])
+        attempts = f"  ({job['attempts']} attempts)" if job["attempts"] > 1 else ""
+        source = "native" if job["cmd"] == "native" else "npx"
+        print(f"  {seconds:>8.2f}s  [{source}] {label}{attempts}")
 
-    print("\n>> Installing...")
-    success_count = 0
-    fail_count = 0
 
-    for cmd in commands:
-        print(f"\n> {cmd}")
-        try:
-            result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
-            if result.stdout:
-                print(result.stdout)
-            success_count += 1
-        except subprocess.CalledProcessError as e:
-            print(f"  [FAILED] {e}")
-            if e.stderr:
-                print(f"  {e.stderr}")
-            fail_count += 1
+def finish_journal(journal: InstallJournal, success_count: int, fail_count: int,
+                   ledger_path: str = None) -> bool:
+    """성공한 작업을 설치 기록에 반영하고 결과 출력, 실패가 없으면 True"""
+    succeeded = journal.succeeded()
+    if succeeded:
+        ledger = load_ledger(ledger_path)
+        record_installs(ledger, succeeded, journal.run.get("entries"), journal.run.get("commit"))
+        save_ledger(ledger, ledger_path)
 
+    print_durations(journal)
     print(f"\n[Installation complete!]")
     print(f"   Success: {success_count}, Failed: {fail_count}")
+    if fail_count:
+        print("   Run install --resume to retry the failed templates.")
+    return fail_count == 0
+
+
+def resume_install(jobs: int = 1, batch: bool = False, ledger_path: str = None,
+                   store_dir: str = None, journal_path: str = None,
+                   retries: int = DEFAULT_RETRIES) -> bool:
+    """저널의 마지막 실행에서 끝나지 않은 작업만 다시 실행"""
+    journal = InstallJournal.load(journal_path)
+    if journal is None:
+        print(f"Error: No install journal at {journal_path or JOURNAL_FILE}")
+        return False
+
+    pending = journal.pending()
+    print(f"\n[Resuming install: {', '.join(journal.run.get('sets', []))}]")
+    print(f"   started {journal.run.get('started_at', 'unknown')}, "
+          f"{len(journal.jobs) - len(pending)} of {len(journal.jobs)} jobs done")
+    if not pending:
+        print("Nothing to resume.")
+        return True
+
+    for _, job in pending:
+        state = {"failed": "failed", "fallback": "native install failed, npx pending"}.get(
+            job["state"], "not finished"
+        )
+        print(f"  - {_job_label(job['category'], job['items'])} ({state})")
+
+    manifest = load_manifest(store_dir)
+    try:
+        success_count, fail_count = run_journal(journal, manifest, store_dir, jobs, batch, retries)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Run install --resume to continue.")
+        return False
+    return finish_journal(journal, success_count, fail_count, ledger_path)
+
+
+def lookup_templates(templates: dict, index_path: str = None) -> tuple:
+    """세트의 각 템플릿을 인덱스에서 조회, ({"category/item": 항목 또는 None}, 커밋) 반환
+
+    인덱스 파일이 없으면 (None, None)
+    """
+    if index_path is None:
+        index_path = INDEX_FILE
+    if not Path(index_path).exists():
+        return None, None
+
+    entries = {}
+    if is_sqlite_store(index_path):
+        conn = open_store(index_path)
+        try:
+            for category, items in templates.items():
+                for item in items:
+                    entries[f"{category}/{item}"] = store_get_template(conn, category, item)
+            commit = store_meta(conn, "commit")
+        finally:
+            conn.close()
+        return entries, commit
+
+    index = load_index(index_path, compact=True)
+    for category, items in templates.items():
+        for item in items:
+            entries[f"{category}/{item}"] = (
+                index.lookup(*split_template_path(category, item)) if index else None
+            )
+    return entries, index.get("commit")
+
+
+def load_template_keys(index_path: str = None) -> set:
+    """인덱스의 모든 설치 경로 집합 ("category/subcat/name", root 는 "category/name")"""
+    if index_path is None:
+        index_path = INDEX_FILE
+    if is_sqlite_store(index_path):
+        conn = open_store(index_path)
+        try:
+            return {tag_path(*entry) for entry in store_entries(conn)}
+        finally:
+            conn.close()
+    return {tag_path(*entry) for entry in index_entries(load_index(index_path, compact=True))}
+
+
+def suggest_templates(path: str, keys: set, limit: int = 3) -> list:
+    """인덱스에 없는 템플릿과 비슷한 경로 (같은 카테고리, 이름이 같은 이동 항목 우선)"""
+    category, _, _ = path.partition("/")
+    name = path.rsplit("/", 1)[-1]
+    candidates = [key for key in keys if key.startswith(category + "/")]
+    moved = sorted(key for key in candidates if key.rsplit("/", 1)[-1] == name)
+    close = difflib.get_close_matches(path, candidates, n=limit, cutoff=0.6)
+    return list(dict.fromkeys(moved + close))[:limit]
+
+
+def find_missing_templates(entries: dict, index_path: str = None) -> dict:
+    """lookup_templates 결과 중 인덱스에 없는 항목 {경로: 추천 경로 목록}
+
+    조회는 이미 해시 조회로 끝났으므로, 인덱스 전체 경로는 빠진 항목이 있을 때만 읽음
+    """
+    missing = [path for path, entry in entries.items() if entry is None]
+    if not missing:
+        return {}
+    keys = load_template_keys(index_path)
+    return {path: suggest_templates(path, keys) for path in missing}
+
+
+def template_fingerprint(entry: dict) -> str:
+    """인덱스 항목의 내용 해시 (파일의 git blob id, 해시가 없는 예전 인덱스는 항목 JSON 의 sha256)"""
+    if entry.get("hash"):
+        return entry["hash"]
+    data = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def load_ledger(ledger_path: str = None) -> dict:
+    """설치 기록 로드"""
+    path = Path(ledger_path or LEDGER_FILE)
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            print(f"Warning: ignoring unreadable ledger {path}")
+    return {"version": "1.0", "templates": {}}
+
+
+def save_ledger(ledger: dict, ledger_path: str = None):
+    """설치 기록 저장 (임시 파일 + rename)"""
+    path = Path(ledger_path or LEDGER_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(ledger, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def plan_ledger_changes(templates: dict, entries: dict, ledger: dict,
+                        force: bool = False) -> tuple:
+    """설치할 템플릿과 변경 없는 템플릿 분리
+
+    ({category: [item]}, {"category/item": 사유}, [변경 없는 "category/item"]) 반환.
+    인덱스에 없는 템플릿은 확인할 수 없으므로 항상 설치
+    """
+    pending = {category: [] for category in templates}
+    reasons = {}
+    unchanged = []
+    records = ledger.get("templates", {})
+
+    for category, items in templates.items():
+        for item in items:
+            key = f"{category}/{item}"
+            entry = (entries or {}).get(key)
+            record = records.get(key)
+            if force:
+                reason = "forced"
+            elif entry is None:
+                reason = "unverified"
+            elif record is None:
+                reason = "new"
+            elif record.get("content_hash") != template_fingerprint(entry):
+                reason = "changed"
+            else:
+                unchanged.append(key)
+                continue
+            pending[category].append(item)
+            reasons[key] = reason
+
+    return pending, reasons, unchanged
+
+
+def record_installs(ledger: dict, succeeded: list, entries: dict, commit: str,
+                    project_dir: str = "."):
+    """성공한 설치 작업을 설치 기록에 반영
+
+    npx 는 중첩 항목을 다른 경로에 설치할 수 있으므로 실제 설치된 본문 파일 경로도 기록
+    """
+    now = datetime.now().isoformat()
+    records = ledger.setdefault("templates", {})
+    for category, items, _ in succeeded:
+        for item in items:
+            key = f"{category}/{item}"
+            entry = (entries or {}).get(key)
+            records[key] = {
+                "source_commit": commit,
+                "content_hash": template_fingerprint(entry) if entry is not None else None,
+                "installed_at": now,
+            }
+            path = locate_installed(category, item, project_dir)
+            if path is not None:
+                records[key]["path"] = path.relative_to(project_dir).as_posix()
+
+
+def install_set(set_names, sets_path: str = None, dry_run: bool = False,
+                index_path: str = None, jobs: int = 1, batch: bool = False,
+                force: bool = False, ledger_path: str = None, native: bool = True,
+                store_dir: str = None, skip_missing: bool = False, journal_path: str = None,
+                retries: int = DEFAULT_RETRIES) -> bool:
+    """템플릿 세트 설치 (로컬 저장소에 있는 템플릿은 npx 없이 바로 설치)
+
+    set_names 는 세트 이름 하나 또는 목록 (하나의 계획으로 합침). 인덱스에 없는
+    템플릿이 있으면 어떤 설치도 시작하기 전에 중단 (skip_missing 이면 빼고 진행).
+    실패가 없으면 True
+    """
+    compiled = load_compiled_sets(sets_path)
+    if not compiled:
+        return False
+    sets_data = compiled["data"]
+
+    if isinstance(set_names, str):
+        set_names = [set_names]
+    set_names = list(dict.fromkeys(set_names))
+    available = list(sets_data.get("sets", {}).keys())
+    unknown = [name for name in set_names if name not in available]
+    if unknown:
+        for name in unknown:
+            print(f"Error: Set '{name}' not found")
+            close = difflib.get_close_matches(name, available, n=3)
+            if close:
+                print(f"  Did you mean: {', '.join(close)}?")
+        print(f"Available sets: {', '.join(available)}")
+        return False
+    broken = [name for name in set_names if name in compiled["errors"]]
+    if broken:
+        for name in broken:
+            print(f"Error: Set '{name}': {compiled['errors'][name]}")
+        return False
+
+    print(f"\n[Installing template set{'s' if len(set_names) > 1 else ''}: {', '.join(set_names)}]")
+    if len(set_names) == 1:
+        print(f"   {sets_data['sets'][set_names[0]].get('description', '')}\n")
+    else:
+        for name in set_names:
+            print(f"   {name}: {sets_data['sets'][name].get('description', '')}")
+        print()
+
+    templates = merge_resolved([compiled["resolved"][name] for name in set_names])
+    entries, commit = lookup_templates(templates, index_path)
+    if entries is None:
+        print("Warning: index not found, templates are not validated (run sync first)\n")
+    else:
+        missing = find_missing_templates(entries, index_path)
+        if missing:
+            print(f"Error: {len(missing)} templates not found in index:")
+            for path, suggestions in missing.items():
+                hint = f"  (did you mean: {', '.join(suggestions)}?)" if suggestions else ""
+                print(f"  ! {path}{hint}")
+            if not skip_missing:
+                print("\nNothing was installed. Fix the set or use --skip-missing to install the rest.")
+                return False
+            print(f"Skipping {len(missing)} missing templates.\n")
+            templates = {
+                category: [item for item in items if f"{category}/{item}" not in missing]
+                for category, items in templates.items()
+            }
+            entries = {path: entry for path, entry in entries.items() if path not in missing}
+
+    ledger = load_ledger(ledger_path)
+    pending, reasons, unchanged = plan_ledger_changes(templates, entries, ledger, force)
+    manifest = load_manifest(store_dir) if native else None
+    native_pending, npx_pending = plan_native_installs(pending, manifest)
+    install_jobs = plan_install_jobs(npx_pending, batch)
+    native_total = sum(len(items) for items in native_pending.values())
+
+    if unchanged:
+        print(f"Up to date ({len(unchanged)}), skipping. Use --force to reinstall.")
+
+    if not install_jobs and not native_total:
+        if unchanged:
+            print("Nothing to do.")
+        else:
+            print("No templates to install.")
+        return True
+
+    total = sum(len(items) for items in pending.values())
+    print(f"Templates to install ({total}):")
+    for category, items in pending.items():
+        for item in items:
+            reason = reasons[f"{category}/{item}"]
+            print(f"  - {TYPE_MAP.get(category, category)}: {item} ({reason})")
+
+    if dry_run:
+        if native_total:
+            print(f"\n[DRY RUN] From local store ({store_dir or STORE_DIR}):")
+            for category, items in native_pending.items():
+                for item in items:
+                    print(f"  {TYPE_MAP.get(category, category)}: {item}")
+        if install_jobs:
+            print("\n[DRY RUN] Commands that would be executed:")
+            for _, _, cmd in install_jobs:
+                print(f"  {cmd}")
+        return True
+
+    previous = InstallJournal.load(journal_path)
+    if previous is not None and previous.pending():
+        print(f"\nNote: discarding the unfinished run of {', '.join(previous.run.get('sets', []))}"
+              " (install --resume would have continued it)")
+
+    # 설치 전에 전체 계획을 저널에 기록
+    journal = InstallJournal(journal_path)
+    planned = {f"{category}/{item}" for category, items in pending.items() for item in items}
+    journal.start(set_names, {k: v for k, v in (entries or {}).items() if k in planned}, commit)
+    for category, items in native_pending.items():
+        for item in items:
+            journal.plan(category, [item], "native")
+    for job in install_jobs:
+        journal.plan(*job)
+
+    try:
+        success_count, fail_count = run_journal(journal, manifest, store_dir, jobs, batch, retries)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Run install --resume to continue.")
+        return False
+    return finish_journal(journal, success_count, fail_count, ledger_path)
 
 
 def list_sets(sets_path: str = None):
     """사용 가능한 세트 목록"""
-    sets_data = load_sets(sets_path)
-    if not sets_data:
+    compiled = load_compiled_sets(sets_path)
+    if not compiled:
         return
+    sets_data = compiled["data"]
 
     print("\n[Available Template Sets]\n")
     for name, set_def in sets_data.get("sets", {}).items():
+        set_def = set_def or {}
         desc = set_def.get("description", "No description")
 
-        templates = resolve_set(sets_data, name)
-        total = sum(len(v) for v in templates.values())
-
-        print(f"  {name:<20} ({total} templates)")
+        if name in compiled["errors"]:
+            print(f"  {name:<20} (error: {compiled['errors'][name]})")
+        else:
+            templates = compiled["resolved"][name]
+            total = sum(len(v) for v in templates.values())
+            print(f"  {name:<20} ({total} templates)")
         if set_def.get("extends"):
             print(f"    extends: {', '.join(set_def['extends'])}")
         print()
@@ -164,15 +858,19 @@ def list_sets(sets_path: str = None):
 
 def show_set_details(set_name: str, sets_path: str = None):
     """세트 상세 내용 표시"""
-    sets_data = load_sets(sets_path)
-    if not sets_data:
+    compiled = load_compiled_sets(sets_path)
+    if not compiled:
         return
+    sets_data = compiled["data"]
 
     if set_name not in sets_data.get("sets", {}):
         print(f"Error: Set '{set_name}' not found")
         return
+    if set_name in compiled["errors"]:
+        print(f"Error: Set '{set_name}': {compiled['errors'][set_name]}")
+        return
 
-    templates = resolve_set(sets_data, set_name)
+    templates = compiled["resolved"][set_name]
     print(f"\n[Set: {set_name}]")
     print(f"   {sets_data['sets'][set_name].get('description', '')}\n")
 
@@ -184,6 +882,155 @@ def show_set_details(set_name: str, sets_path: str = None):
             print()
 
 
+def _hash_installed(path: Path) -> str:
+    """설치된 파일의 git blob id (없거나 읽을 수 없으면 None)"""
+    try:
+        return git_blob_id(path.read_bytes())
+    except OSError:
+        return None
+
+
+def find_installed_files(ledger: dict, project_dir: str = ".") -> tuple:
+    """확인할 설치 파일 찾기
+
+    ({"category/item": 경로} 설치 기록의 템플릿, [(category, 이름, 경로)] 기록 없이
+    .claude/ 에 있는 파일, 파일로 확인할 수 없는 기록 수) 반환.
+    hooks/mcps/settings 는 공용 설정 파일에 병합되므로 확인할 수 없음
+    """
+    recorded = {}
+    uncheckable = 0
+    for key, record in ledger.get("templates", {}).items():
+        category, _, item = key.partition("/")
+        path = installed_file(category, item, project_dir)
+        if path is None:
+            uncheckable += 1
+        elif record.get("path"):
+            recorded[key] = Path(project_dir) / record["path"]
+        else:
+            # 경로 기록이 없는 예전 설치는 가능한 배치 중 실제 있는 파일
+            recorded[key] = locate_installed(category, item, project_dir) or path
+
+    known = set(recorded.values())
+    claude_dir = Path(project_dir) / ".claude"
+    found = [
+        (category, path.stem, path)
+        for category in FILE_CATEGORIES for path in sorted((claude_dir / category).rglob("*.md"))
+    ] + [
+        ("skills", path.parent.name, path) for path in sorted(claude_dir.glob("skills/**/SKILL.md"))
+    ]
+    unrecorded = [(category, name, path) for category, name, path in found if path not in known]
+    return recorded, unrecorded, uncheckable
+
+
+def classify_installed(disk: str, index_hash: str, recorded: str) -> tuple:
+    """설치 파일 상태 (상태, 설명)
+
+    recorded 는 설치 기록의 blob id (설치 당시 인덱스 내용). 기록이 없으면 어느 쪽이
+    바뀌었는지 알 수 없으므로 인덱스와 다르면 stale
+    """
+    if disk == index_hash:
+        return "up-to-date", ""
+    if recorded is None or len(recorded) != 40:
+        return "stale", "no install record"
+    if disk == recorded:
+        return "stale", ""
+    if recorded == index_hash:
+        return "modified-locally", ""
+    return "modified-locally", "upstream changed too"
+
+
+def check_outdated(index_path: str = None, ledger_path: str = None, project_dir: str = ".",
+                   workers: int = None) -> bool:
+    """.claude/ 에 설치된 템플릿 파일을 해시해 인덱스와 비교 (네트워크 없이)
+
+    설치 기록에 있는 템플릿과, 기록 없이 .claude/ 에 있는 같은 이름의 템플릿을
+    stale / modified-locally / up-to-date 로 분류. 파일 해시는 스레드 풀에서 병렬로 계산.
+    인덱스가 없으면 False
+    """
+    ledger = load_ledger(ledger_path)
+    records = ledger.get("templates", {})
+    recorded, unrecorded, uncheckable = find_installed_files(ledger, project_dir)
+
+    # 기록 없는 파일은 인덱스에서 같은 카테고리, 같은 이름의 템플릿과 비교
+    matches = {}
+    if unrecorded:
+        if index_path is None:
+            index_path = INDEX_FILE
+        keys = load_template_keys(index_path) if Path(index_path).exists() else set()
+        by_name = {}
+        for key in keys:
+            category, _, item = key.partition("/")
+            by_name.setdefault((category, item.rsplit("/", 1)[-1]), []).append(key)
+        for category, name, path in unrecorded:
+            if (category, name) in by_name:
+                matches[path] = sorted(by_name[(category, name)])
+
+    wanted = {}
+    for key in list(recorded) + [key for keys in matches.values() for key in keys]:
+        category, _, item = key.partition("/")
+        wanted.setdefault(category, []).append(item)
+    entries, commit = lookup_templates(wanted, index_path)
+    if entries is None:
+        print(f"Error: Index file not found at {index_path or INDEX_FILE} (run sync first)")
+        return False
+
+    paths = list(recorded.values()) + list(matches)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        disk = dict(zip(paths, pool.map(_hash_installed, paths)))
+    elapsed = time.perf_counter() - start
+
+    results = {state: [] for state in ("stale", "modified-locally", "up-to-date")}
+    missing, not_indexed, unhashed = [], [], []
+    checks = [(key, path, records[key].get("content_hash")) for key, path in recorded.items()]
+    for path, keys in matches.items():
+        # 여러 서브카테고리에 같은 이름이 있으면 내용이 같은 쪽, 없으면 첫 번째
+        same = [key for key in keys if (entries.get(key) or {}).get("hash") == disk[path]]
+        checks.append(((same or keys)[0], path, None))
+
+    for key, path, record_hash in checks:
+        entry = entries.get(key)
+        if disk[path] is None:
+            missing.append(key)
+        elif entry is None:
+            not_indexed.append(key)
+        elif not entry.get("hash"):
+            unhashed.append(key)
+        else:
+            state, note = classify_installed(disk[path], entry["hash"], record_hash)
+            results[state].append((key, note))
+
+    print(f"\n[Outdated check: {len(checks)} installed templates, index commit "
+          f"{(commit or 'unknown')[:12]}, hashed in {elapsed:.3f}s]\n")
+    titles = {
+        "stale": "Stale - the index has newer content",
+        "modified-locally": "Modified locally",
+        "up-to-date": "Up to date",
+    }
+    for state, items in results.items():
+        if items:
+            print(f"{titles[state]} ({len(items)}):")
+            for key, note in sorted(items):
+                print(f"  {key}" + (f"  ({note})" if note else ""))
+            print()
+    for title, keys in (("Recorded but missing from .claude/", missing),
+                        ("No longer in the index", not_indexed)):
+        if keys:
+            print(f"{title} ({len(keys)}):")
+            for key in sorted(keys):
+                print(f"  {key}")
+            print()
+    if unhashed:
+        print(f"{len(unhashed)} templates cannot be compared: the index has no content hashes"
+              " (run sync again)")
+    if uncheckable:
+        print(f"{uncheckable} hooks/mcps/settings templates are merged into shared config files"
+              " and are not checked")
+    if results["stale"]:
+        print("Run install for their sets again to update the stale templates.")
+    return True
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Install AITMPL template sets",
@@ -192,15 +1039,43 @@ def main():
 Examples:
   %(prog)s --list                      # List available sets
   %(prog)s frontend                    # Install frontend set
+  %(prog)s frontend backend            # Install several sets as one plan
   %(prog)s frontend --dry-run          # Preview without installing
+  %(prog)s frontend -j 4 --batch       # 4 parallel installs, batched per type
+  %(prog)s frontend --force            # Reinstall even if up to date
+  %(prog)s frontend --no-native        # Always use npx, ignore the local store
+  %(prog)s frontend --skip-missing     # Install what exists even if the set has typos
+  %(prog)s --resume                    # Continue an interrupted run, retry its failures
+  %(prog)s --outdated                  # Compare installed files with the index (offline)
   %(prog)s --details backend           # Show set contents
         """
     )
-    parser.add_argument("set_name", nargs="?", help="Template set to install")
+    parser.add_argument("set_names", nargs="*", metavar="SET", help="Template set(s) to install")
     parser.add_argument("-l", "--list", action="store_true", help="List available sets")
     parser.add_argument("--dry-run", action="store_true", help="Show commands without executing")
     parser.add_argument("-d", "--details", metavar="SET", help="Show details of a specific set")
     parser.add_argument("-f", "--file", default=SETS_FILE, help="Template sets file path")
+    parser.add_argument("-i", "--index", default=INDEX_FILE,
+                        help="Index used to validate templates (.json or .db)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of installs to run concurrently")
+    parser.add_argument("--batch", action="store_true",
+                        help="Install several templates of one type per npx call (comma-separated)")
+    parser.add_argument("--force", action="store_true",
+                        help="Reinstall templates recorded as up to date in the install ledger")
+
+    parser.add_argument("--no-native", action="store_true",
+                        help="Install everything through npx instead of the local template store")
+    parser.add_argument("--store-dir", default=STORE_DIR,
+                        help="Local template store filled by sync")
+    parser.add_argument("--skip-missing", action="store_true",
+                        help="Install the templates that exist instead of aborting on missing ones")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last run from its journal (unfinished and failed jobs only)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Retries per failed npx install, with backoff (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--outdated", action="store_true",
+                        help="List stale, locally modified and up-to-date installed templates")
 
     args = parser.parse_args()
 
@@ -208,8 +1083,20 @@ Examples:
         list_sets(args.file)
     elif args.details:
         show_set_details(args.details, args.file)
-    elif args.set_name:
-        install_set(args.set_name, args.file, args.dry_run)
+    elif args.outdated:
+        if not check_outdated(args.index):
+            sys.exit(1)
+    elif args.resume:
+        if not resume_install(args.jobs, args.batch, store_dir=args.store_dir,
+                              retries=args.retries):
+            sys.exit(1)
+    elif args.set_names:
+        ok = install_set(args.set_names, args.file, args.dry_run, args.index, args.jobs,
+                         args.batch, args.force, native=not args.no_native,
+                         store_dir=args.store_dir, skip_missing=args.skip_missing,
+                         retries=args.retries)
+        if not ok:
+            sys.exit(1)
     else:
         parser.print_help()
 
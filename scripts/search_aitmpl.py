@@ -4,11 +4,36 @@ AITMPL 템플릿 태그 기반 검색
 용도별로 적절한 템플릿을 빠르게 찾기
 """
 
+import heapq
 import json
 import argparse
+import math
+import os
+import re
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+from itertools import islice
 from pathlib import Path
 
+from compact_index import CompactIndex
+from search_cache import cached_render
+
 INDEX_FILE = ".claude/aitmpl-index.json"
+NGRAM_SIZE = 3
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+TEMPLATE_FIELDS = ("name", "file", "size")
+FORMATS = ["table", "commands", "json", "ndjson"]
+MATCH_MODES = ["each", "any", "all"]
+# updated_at 을 찾을 인덱스 JSON 앞부분 크기와 패턴 (전체 파싱 없이 보조 인덱스 버전 확인)
+INDEX_HEADER_BYTES = 4096
+UPDATED_AT_RE = re.compile(rb'"updated_at":\s*("(?:[^"\\]|\\.)*")')
+
+# BM25 파라미터와 필드 가중치 (필드 토큰을 가중치만큼 반복해서 색인)
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"name": 3, "subcategory": 2, "tags": 2, "description": 2, "body": 1}
+TOKEN_RE = re.compile(r"\w+")
 
 # 태그 → 템플릿 매핑
 TAG_MAPPINGS = {
@@ -72,8 +97,8 @@ TAG_MAPPINGS = {
 }
 
 
-def load_index(index_path: str = None) -> dict:
-    """인덱스 파일 로드"""
+def load_index(index_path: str = None, compact: bool = False) -> dict:
+    """인덱스 파일 로드 (compact=True 면 메모리를 적게 쓰는 읽기 전용 CompactIndex)"""
     if index_path is None:
         index_path = INDEX_FILE
 
@@ -83,8 +108,424 @@ def load_index(index_path: str = None) -> dict:
         print("Run sync-aitmpl-index.py first to create the index.")
         return {}
 
+    if is_sqlite_store(index_path):
+        return _load_index_sqlite(path, compact)
+
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        index = json.load(f)
+    return CompactIndex.from_index(index) if compact else index
+
+
+def is_sqlite_store(index_path: str) -> bool:
+    """SQLite 인덱스 저장소 경로인지 확인"""
+    return Path(index_path or INDEX_FILE).suffix in SQLITE_SUFFIXES
+
+
+def write_sqlite_store(index: dict, db_path: str):
+    """인덱스를 SQLite DB로 저장 (FTS5 trigram 테이블 포함, 원자적 교체)"""
+    path = Path(db_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(
+            "CREATE TABLE templates (id INTEGER PRIMARY KEY, category TEXT, subcategory TEXT,"
+            " name TEXT, file TEXT, size INTEGER, extra TEXT)"
+        )
+        conn.execute("CREATE INDEX templates_key ON templates (category, subcategory, name)")
+
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in index.items() if k != "categories"]
+        )
+
+        rows = []
+        for category, subcats in index.get("categories", {}).items():
+            for subcat, templates in subcats.items():
+                for tmpl in templates:
+                    extra = {k: v for k, v in tmpl.items() if k not in TEMPLATE_FIELDS}
+                    rows.append((
+                        len(rows) + 1, category, subcat, tmpl.get("name", ""), tmpl.get("file"),
+                        tmpl.get("size"), json.dumps(extra, ensure_ascii=False) if extra else None
+                    ))
+        conn.executemany("INSERT INTO templates VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+        try:
+            # FTS5 의 대소문자 접기는 str.lower() 와 다르므로 (İ 등) 파이썬에서 소문자로 바꾼
+            # 값을 색인해 JSON/ngram 검색과 후보가 어긋나지 않게 함
+            conn.execute(
+                "CREATE VIRTUAL TABLE templates_fts USING fts5(name_lower, subcategory_lower,"
+                " content='', tokenize='trigram')"
+            )
+            conn.executemany(
+                "INSERT INTO templates_fts (rowid, name_lower, subcategory_lower) VALUES (?, ?, ?)",
+                [(row[0], row[3].lower(), row[2].lower()) for row in rows]
+            )
+        except sqlite3.OperationalError as e:
+            # FTS5/trigram 미지원 SQLite (< 3.34) - 검색은 테이블 스캔으로 대체
+            print(f"Warning: FTS5 trigram index unavailable ({e})")
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+
+
+def open_store(db_path: str) -> sqlite3.Connection:
+    """SQLite 인덱스 저장소 열기 (읽기 전용, 없으면 None)"""
+    path = Path(db_path)
+    if not path.exists():
+        print(f"Error: Index file not found at {db_path}")
+        print("Run sync-aitmpl-index.py --store sqlite first to create the index.")
+        return None
+    return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+
+
+def _load_index_sqlite(path: Path, compact: bool = False) -> dict:
+    """SQLite 저장소에서 JSON과 같은 구조의 인덱스 복원"""
+    conn = open_store(path)
+    try:
+        index = {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta ORDER BY rowid")}
+        rows = conn.execute(
+            "SELECT category, subcategory, name, file, size, extra FROM templates ORDER BY id"
+        )
+        if compact:
+            return CompactIndex.from_rows(index, (
+                (category, subcat, {"name": name, "file": file, "size": size,
+                                    **(json.loads(extra) if extra else {})})
+                for category, subcat, name, file, size, extra in rows
+            ))
+        categories = {}
+        for category, subcat, name, file, size, extra in rows:
+            tmpl = {"name": name, "file": file, "size": size}
+            if extra:
+                tmpl.update(json.loads(extra))
+            categories.setdefault(category, {}).setdefault(subcat, []).append(tmpl)
+    finally:
+        conn.close()
+
+    # 키 순서를 save_index 출력과 맞춤
+    summary = index.pop("summary", None)
+    index["categories"] = categories
+    if summary is not None:
+        index["summary"] = summary
+    return index
+
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    """소문자 값을 색인한 FTS5 테이블 존재 여부 (원문을 색인한 이전 형식은 쓰지 않음)"""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'templates_fts'"
+    ).fetchone()
+    return row is not None and "name_lower" in row[0]
+
+
+def search_templates_store(query: str, conn: sqlite3.Connection) -> list:
+    """SQLite 저장소에서 쿼리로 템플릿 검색 (search_templates와 같은 결과)"""
+    return list(iter_search_templates_store(query, conn))
+
+
+def iter_search_templates_store(query: str, conn: sqlite3.Connection):
+    """search_templates_store 의 제너레이터 버전 (커서에서 한 행씩 읽음)"""
+    query_lower = query.lower()
+
+    if len(query_lower) >= NGRAM_SIZE and _has_fts(conn):
+        phrase = query_lower.replace('"', '""')
+        rows = conn.execute(
+            "SELECT t.category, t.subcategory, t.name FROM templates_fts"
+            " JOIN templates t ON t.id = templates_fts.rowid"
+            " WHERE templates_fts MATCH ? ORDER BY t.id",
+            (f'{{name_lower subcategory_lower}} : "{phrase}"',)
+        )
+    else:
+        rows = conn.execute("SELECT category, subcategory, name FROM templates ORDER BY id")
+
+    # trigram 이 접은 문자열 기준 후보를 파이썬 lower() 기준으로 다시 확인
+    for category, subcat, name in rows:
+        if query_lower in name.lower() or query_lower in subcat.lower():
+            yield _template_result(category, subcat, name)
+
+
+def split_template_path(category: str, item: str) -> tuple:
+    """설치 항목(subcat/name)을 (category, subcategory, name)으로 분리"""
+    if "/" in item:
+        subcat, name = item.split("/", 1)
+        return category, subcat, name
+    return category, "root", item
+
+
+def store_get_template(conn: sqlite3.Connection, category: str, item: str) -> dict:
+    """SQLite 저장소에서 템플릿 항목 조회 (없으면 None)"""
+    row = conn.execute(
+        "SELECT name, file, size, extra FROM templates"
+        " WHERE category = ? AND subcategory = ? AND name = ? ORDER BY id LIMIT 1",
+        split_template_path(category, item)
+    ).fetchone()
+    if row is None:
+        return None
+    tmpl = {"name": row[0], "file": row[1], "size": row[2]}
+    if row[3]:
+        tmpl.update(json.loads(row[3]))
+    return tmpl
+
+
+def store_has_template(conn: sqlite3.Connection, category: str, item: str) -> bool:
+    """SQLite 저장소에 템플릿이 있는지 확인"""
+    return store_get_template(conn, category, item) is not None
+
+
+def store_meta(conn: sqlite3.Connection, key: str):
+    """SQLite 저장소의 인덱스 메타데이터 값 (없으면 None)"""
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def sidecar_path(index_path: str, kind: str) -> Path:
+    """인덱스 옆에 저장되는 보조 파일 경로 (aitmpl-index.<kind>.json)"""
+    path = Path(index_path or INDEX_FILE)
+    return path.with_name(f"{path.stem}.{kind}.json")
+
+
+def index_updated_at(index_path: str = None) -> str:
+    """인덱스의 updated_at (JSON 은 앞부분만 읽어 확인, 인덱스가 없으면 None)
+
+    save_index 는 updated_at 을 두 번째 키로 쓰므로 보통 전체를 파싱하지 않음
+    """
+    path = Path(index_path or INDEX_FILE)
+    if not path.exists():
+        return None
+    if is_sqlite_store(str(path)):
+        try:
+            conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                return store_meta(conn, "updated_at")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+    try:
+        with open(path, "rb") as f:
+            head = f.read(INDEX_HEADER_BYTES)
+        match = UPDATED_AT_RE.search(head)
+        if match:
+            return json.loads(match.group(1))
+        # 앞부분에 없으면 (다른 도구가 쓴 인덱스) 전체 파싱
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("updated_at")
+    except (OSError, ValueError):
+        return None
+
+
+def load_sidecar(index_path: str, kind: str, index: dict = None) -> dict:
+    """보조 인덱스 로드 (없거나 인덱스 버전이 다르면 None)
+
+    index 가 없으면 인덱스 파일의 updated_at 을 index_updated_at 으로 확인
+    """
+    path = sidecar_path(index_path, kind)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    version = index.get("updated_at") if index is not None else index_updated_at(index_path)
+    if version is None or data.get("index_version") != version:
+        return None
+    return data
+
+
+def _ngrams(text: str) -> set:
+    """문자열의 n-gram 집합"""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def ngram_group(category: str, subcat: str, templates: list) -> tuple:
+    """서브카테고리 하나의 ngram 조각 (entries, 이름별 gram 집합, 서브카테고리 gram 집합)"""
+    names = [tmpl.get("name", "") for tmpl in templates]
+    return ([[category, subcat, name] for name in names],
+            [_ngrams(name.lower()) for name in names],
+            _ngrams(subcat.lower()))
+
+
+def assemble_ngram_index(version: str, groups) -> dict:
+    """스캔 순서의 ngram_group 조각들로 ngram 사이드카 구성"""
+    entries = []      # [category, subcategory, name] (스캔 순서 = 검색 결과 순서)
+    subcats = []      # [첫 entry id, 끝 entry id)
+    names = defaultdict(list)
+    subcategories = defaultdict(list)
+
+    for group_entries, name_grams, subcat_grams in groups:
+        start = len(entries)
+        for entry, grams in zip(group_entries, name_grams):
+            entry_id = len(entries)
+            entries.append(entry)
+            for gram in grams:
+                names[gram].append(entry_id)
+        subcat_id = len(subcats)
+        subcats.append([start, len(entries)])
+        for gram in subcat_grams:
+            subcategories[gram].append(subcat_id)
+
+    return {
+        "index_version": version,
+        "n": NGRAM_SIZE,
+        "entries": entries,
+        "subcats": subcats,
+        "names": dict(names),
+        "subcategories": dict(subcategories),
+    }
+
+
+def build_ngram_index(index: dict) -> dict:
+    """템플릿 이름/서브카테고리 이름의 trigram posting list 생성"""
+    return assemble_ngram_index(index.get("updated_at"), (
+        ngram_group(category, subcat, templates)
+        for category, subcats in index.get("categories", {}).items()
+        for subcat, templates in subcats.items()
+    ))
+
+
+def _intersect_postings(postings: dict, grams: set) -> set:
+    """모든 gram을 포함하는 id 집합 (짧은 posting부터 교집합)"""
+    lists = []
+    for gram in grams:
+        if gram not in postings:
+            return set()
+        lists.append(postings[gram])
+    lists.sort(key=len)
+    result = set(lists[0])
+    for ids in lists[1:]:
+        result.intersection_update(ids)
+        if not result:
+            break
+    return result
+
+
+def tokenize(text: str) -> list:
+    """검색용 토큰 분리 (소문자, 단어 문자 단위)"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def document_terms(doc: dict) -> tuple:
+    """문서 하나의 (필드 가중치를 곱한 term 빈도, 가중 길이)
+
+    사이드카에서 되살린 문서 (sidecar_documents) 는 저장된 값을 그대로 사용
+    """
+    if "terms" in doc:
+        return doc["terms"], doc["length"]
+    terms = Counter()
+    length = 0
+    for field, weight in FIELD_WEIGHTS.items():
+        value = doc.get(field) or ""
+        if isinstance(value, list):
+            value = " ".join(value)
+        counts = Counter(tokenize(value))
+        for token, count in counts.items():
+            terms[token] += count * weight
+        length += sum(counts.values()) * weight
+    return terms, length
+
+
+def build_fulltext_index(index: dict, documents: list) -> dict:
+    """템플릿 문서(frontmatter + 본문)로 BM25 역색인 생성
+
+    documents: sync가 추출한 [{"category", "subcategory", "name", "description", "tags", "body"}]
+    """
+    return assemble_fulltext_index(index.get("updated_at"), documents,
+                                   [document_terms(doc) for doc in documents])
+
+
+def assemble_fulltext_index(version: str, documents: list, doc_terms: list) -> dict:
+    """문서와 document_terms 결과(같은 순서)로 BM25 역색인 구성"""
+    docs = []
+    lengths = []
+    postings = defaultdict(list)
+
+    for doc, (terms, length) in zip(documents, doc_terms):
+        doc_id = len(docs)
+        docs.append([doc["category"], doc["subcategory"], doc["name"], doc.get("description") or ""])
+        lengths.append(length)
+        for term, tf in terms.items():
+            postings[term].extend((doc_id, tf))
+
+    return {
+        "index_version": version,
+        "docs": docs,
+        "lengths": lengths,
+        "avgdl": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "postings": dict(postings),
+    }
+
+
+def sidecar_documents(fulltext: dict, tags: dict, keys: set) -> dict:
+    """이전 BM25/태그 사이드카에서 주어진 (category, subcategory) 의 문서를 되살림
+
+    본문 대신 term 빈도/길이와 태그를 담은 문서라 파일을 다시 읽지 않고도 같은 사이드카를
+    만들 수 있음. {(category, subcategory): [문서]} (스캔 순서)
+    """
+    groups = {key: [] for key in keys}
+    by_id = {}
+    by_path = defaultdict(list)
+    for doc_id, (category, subcat, name, description) in enumerate(fulltext["docs"]):
+        if (category, subcat) not in groups:
+            continue
+        doc = {"category": category, "subcategory": subcat, "name": name,
+               "description": description, "tags": [], "terms": {},
+               "length": fulltext["lengths"][doc_id]}
+        groups[(category, subcat)].append(doc)
+        by_id[doc_id] = doc
+        by_path[tag_path(category, subcat, name)].append(doc)
+
+    for term, posting in fulltext["postings"].items():
+        for i in range(0, len(posting), 2):
+            doc = by_id.get(posting[i])
+            if doc is not None:
+                doc["terms"][term] = posting[i + 1]
+
+    # 자동 태그와 복합 태그도 함께 붙지만 다시 만들 때 같은 결과가 됨
+    for tag, paths in tags["tags"].items():
+        for path in paths:
+            for doc in by_path.get(path, ()):
+                doc["tags"].append(tag)
+    return groups
+
+
+def search_fulltext(query: str, fulltext: dict, top_k: int = 10) -> list:
+    """BM25 점수 상위 top_k 템플릿 검색"""
+    docs = fulltext["docs"]
+    lengths = fulltext["lengths"]
+    avgdl = fulltext["avgdl"] or 1.0
+    total = len(docs)
+
+    scores = defaultdict(float)
+    for term in set(tokenize(query)):
+        posting = fulltext["postings"].get(term)
+        if not posting:
+            continue
+        df = len(posting) // 2
+        idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+        for i in range(0, len(posting), 2):
+            doc_id, tf = posting[i], posting[i + 1]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avgdl)
+            scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    # 동점이면 스캔 순서 유지
+    top = heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    results = []
+    for doc_id, score in top:
+        category, subcat, name, description = docs[doc_id]
+        result = _template_result(category, subcat, name)
+        result["score"] = round(score, 4)
+        result["description"] = description
+        results.append(result)
+    return results
 
 
 def resolve_tags(tags: list, resolved: set = None) -> set:
@@ -109,32 +550,257 @@ def resolve_tags(tags: list, resolved: set = None) -> set:
     return resolved
 
 
-def search_templates(query: str, index: dict) -> list:
-    """쿼리로 템플릿 검색"""
-    results = []
+def tag_path(category: str, subcat: str, name: str) -> str:
+    """태그 테이블에 쓰는 템플릿 경로 (root 는 category/name)"""
+    if subcat == "root":
+        return f"{category}/{name}"
+    return f"{category}/{subcat}/{name}"
+
+
+def template_tags(category: str, subcat: str, templates: list) -> dict:
+    """서브카테고리 하나의 태그 조각 {태그: 경로 집합} (카테고리/서브카테고리 이름)"""
+    tags = defaultdict(set)
+    for tmpl in templates:
+        path = tag_path(category, subcat, tmpl["name"])
+        tags[category].add(path)
+        if subcat != "root":
+            tags[subcat.lower()].add(path)
+    return tags
+
+
+def document_tags(documents: list) -> dict:
+    """문서 frontmatter tags 의 태그 조각 {태그: 경로 집합}"""
+    tags = defaultdict(set)
+    for doc in documents or []:
+        path = tag_path(doc["category"], doc["subcategory"], doc["name"])
+        for tag in doc.get("tags", []):
+            tag = re.sub(r"\s+", "-", str(tag).strip().lower())
+            if tag:
+                tags[tag].add(path)
+    return tags
+
+
+def build_tag_table(index: dict, documents: list = None) -> dict:
+    """태그 -> 템플릿 경로 테이블 (sync 시 생성)
+
+    카테고리/서브카테고리 이름과 frontmatter tags 에서 태그를 자동으로 만들고,
+    TAG_MAPPINGS 의 복합 태그는 미리 평탄화해 둠
+    """
+    parts = [
+        template_tags(category, subcat, templates)
+        for category, subcats in index.get("categories", {}).items()
+        for subcat, templates in subcats.items()
+    ]
+    parts.append(document_tags(documents))
+    return assemble_tag_table(index.get("updated_at"), parts)
+
+
+def assemble_tag_table(version: str, parts) -> dict:
+    """template_tags 조각들을 합치고 TAG_MAPPINGS 복합 태그를 평탄화"""
+    tags = defaultdict(set)
+    for part in parts:
+        for tag, paths in part.items():
+            tags[tag] |= paths
+
+    for tag, items in TAG_MAPPINGS.items():
+        tags[tag].update(item for item in items if item not in TAG_MAPPINGS)
+
+    closures = {}
+
+    def close(tag: str, stack: set) -> set:
+        if tag not in closures:
+            result = set(tags.get(tag, ()))
+            for item in TAG_MAPPINGS.get(tag, []):
+                if item in TAG_MAPPINGS and item not in stack:
+                    result |= close(item, stack | {tag})
+            closures[tag] = result
+        return closures[tag]
+
+    return {
+        "index_version": version,
+        "tags": {tag: sorted(close(tag, set())) for tag in sorted(tags)},
+    }
+
+
+def load_tag_table(index_path: str = None) -> dict:
+    """sync 가 만든 태그 테이블 로드 (없거나 인덱스와 버전이 다르면 None -> TAG_MAPPINGS 로 해석)"""
+    return load_sidecar(index_path, "tags")
+
+
+def _template_result(category: str, subcat: str, name: str) -> dict:
+    """검색 결과 항목 생성"""
+    cmd_type = category.rstrip("s")  # agents -> agent
+    return {
+        "category": category,
+        "subcategory": subcat,
+        "name": name,
+        "path": f"{category}/{subcat}/{name}",
+        "install_cmd": f"npx claude-code-templates@latest --{cmd_type} {subcat}/{name}"
+    }
+
+
+def search_templates(query: str, index: dict, ngram: dict = None) -> list:
+    """쿼리로 템플릿 검색 (n-gram 인덱스가 있으면 후보만 검사)"""
+    return list(iter_search_templates(query, index, ngram))
+
+
+def iter_search_templates(query: str, index: dict, ngram: dict = None):
+    """search_templates 의 제너레이터 버전 (찾는 즉시 결과를 내보냄)"""
     query_lower = query.lower()
 
+    if ngram is not None and len(query_lower) >= ngram.get("n", NGRAM_SIZE):
+        yield from _iter_search_ngram(query_lower, ngram)
+        return
+
+    for category, subcat, name in index_entries(index):
+        if query_lower in name.lower() or query_lower in subcat.lower():
+            yield _template_result(category, subcat, name)
+
+
+def _iter_search_ngram(query_lower: str, ngram: dict):
+    """posting list 교집합으로 후보를 좁힌 뒤 실제 부분 문자열 검사"""
+    grams = _ngrams(query_lower)
+    entries = ngram["entries"]
+
+    candidates = _intersect_postings(ngram["names"], grams)
+    for subcat_id in _intersect_postings(ngram["subcategories"], grams):
+        start, end = ngram["subcats"][subcat_id]
+        candidates.update(range(start, end))
+
+    for entry_id in sorted(candidates):
+        category, subcat, name = entries[entry_id]
+        if query_lower in name.lower() or query_lower in subcat.lower():
+            yield _template_result(category, subcat, name)
+
+
+def paginate(results, limit: int = None, offset: int = 0):
+    """결과 스트림에서 offset 만큼 건너뛰고 limit 개만 꺼냄 (나머지는 계산하지 않음)"""
+    stop = None if limit is None else (offset or 0) + limit
+    return islice(results, offset or 0, stop)
+
+
+def build_automaton(patterns: list) -> tuple:
+    """Aho-Corasick 오토마톤 (goto, fail, 상태별 매칭 패턴 번호)"""
+    goto = [{}]
+    output = [set()]
+    for pattern_id, pattern in enumerate(patterns):
+        state = 0
+        for ch in pattern:
+            if ch not in goto[state]:
+                goto.append({})
+                output.append(set())
+                goto[state][ch] = len(goto) - 1
+            state = goto[state][ch]
+        output[state].add(pattern_id)
+
+    # BFS 로 실패 링크 계산, 출력은 실패 링크를 따라 합쳐 둠
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    for state in queue:
+        for ch, nxt in goto[state].items():
+            queue.append(nxt)
+            f = fail[state]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            output[nxt] |= output[fail[nxt]]
+
+    return goto, fail, output
+
+
+def automaton_matches(automaton: tuple, text: str) -> set:
+    """text 에 나타나는 모든 패턴 번호 (한 번의 순회)"""
+    goto, fail, output = automaton
+    found = set(output[0])  # 빈 패턴은 항상 매칭
+    state = 0
+    for ch in text:
+        while state and ch not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(ch, 0)
+        found |= output[state]
+    return found
+
+
+def index_entries(index: dict):
+    """인덱스의 (카테고리, 서브카테고리, 이름) 을 순서대로"""
+    if isinstance(index, CompactIndex):
+        yield from index.entries()
+        return
     for category, subcats in index.get("categories", {}).items():
         for subcat, templates in subcats.items():
             for tmpl in templates:
-                name = tmpl.get("name", "").lower()
-                if query_lower in name or query_lower in subcat.lower():
-                    cmd_type = category.rstrip("s")  # agents -> agent
-                    results.append({
-                        "category": category,
-                        "subcategory": subcat,
-                        "name": tmpl["name"],
-                        "path": f"{category}/{subcat}/{tmpl['name']}",
-                        "install_cmd": f"npx claude-code-templates@latest --{cmd_type} {subcat}/{tmpl['name']}"
-                    })
+                yield category, subcat, tmpl["name"]
+
+
+def store_entries(conn: sqlite3.Connection):
+    """SQLite 저장소의 (카테고리, 서브카테고리, 이름) 을 인덱스 순서대로"""
+    yield from conn.execute("SELECT category, subcategory, name FROM templates ORDER BY id")
+
+
+def iter_search_batch(queries: list, entries):
+    """여러 쿼리를 인덱스 한 번 순회로 검사 -> (템플릿 결과, 매칭된 쿼리 번호 집합)"""
+    patterns = list(dict.fromkeys(q.lower() for q in queries))
+    automaton = build_automaton(patterns)
+    # 쿼리 번호 <- 패턴 번호 (같은 쿼리가 여러 번 오거나 대소문자만 다른 경우)
+    owners = defaultdict(list)
+    for query_id, q in enumerate(queries):
+        owners[patterns.index(q.lower())].append(query_id)
+
+    subcat_cache = {}
+    for category, subcat, name in entries:
+        if subcat not in subcat_cache:
+            subcat_cache[subcat] = automaton_matches(automaton, subcat.lower())
+        found = subcat_cache[subcat] | automaton_matches(automaton, name.lower())
+        if found:
+            matched = {query_id for pattern_id in found for query_id in owners[pattern_id]}
+            yield _template_result(category, subcat, name), matched
+
+
+def print_batch_search(queries: list, entries, match: str = "each", format_type: str = "table",
+                       limit: int = None, offset: int = 0):
+    """배치 검색 결과 출력
+
+    each: 쿼리별로 묶어서 출력, any: 하나라도 매칭 (OR), all: 모두 매칭 (AND)
+    """
+    batch = iter_search_batch(queries, entries)
+    if match == "any":
+        print_results(paginate((r for r, _ in batch), limit, offset), format_type)
+        return
+    if match == "all":
+        total = len(queries)
+        print_results(
+            paginate((r for r, matched in batch if len(matched) == total), limit, offset),
+            format_type
+        )
+        return
 
-    return results
+    groups = [[] for _ in queries]
+    for result, matched in batch:
+        for query_id in matched:
+            groups[query_id].append(result)
+    for q, results in zip(queries, groups):
+        if format_type == "ndjson":
+            # 헤더 대신 각 줄에 쿼리를 기록
+            results = ({**r, "query": q} for r in results)
+        elif len(queries) > 1:
+            print(f"\n=== Results for '{q}' ===")
+        print_results(paginate(results, limit, offset), format_type)
 
 
-def search_by_tags(tags: list) -> list:
-    """태그로 검색"""
-    resolved = resolve_tags(tags)
-    results = []
+def search_by_tags(tags: list, table: dict = None) -> list:
+    """태그로 검색 (태그 테이블이 있으면 태그당 조회 한 번)"""
+    return list(iter_search_by_tags(tags, table))
+
+
+def iter_search_by_tags(tags: list, table: dict = None):
+    """search_by_tags 의 제너레이터 버전"""
+    if table is None:
+        resolved = resolve_tags(tags)
+    else:
+        resolved = set()
+        for tag in tags:
+            # 모르는 태그는 직접 경로로 취급
+            resolved.update(table["tags"].get(tag.lower(), [tag]))
 
     for path in sorted(resolved):
         parts = path.split("/")
@@ -142,39 +808,54 @@ def search_by_tags(tags: list) -> list:
             category = parts[0]
             rest = "/".join(parts[1:])
             cmd_type = category.rstrip("s")  # agents -> agent
-            results.append({
+            yield {
                 "path": path,
                 "install_cmd": f"npx claude-code-templates@latest --{cmd_type} {rest}"
-            })
-
-    return results
+            }
 
 
-def print_results(results: list, format_type: str = "table"):
-    """결과 출력"""
-    if not results:
-        print("No results found.")
+def print_results(results, format_type: str = "table"):
+    """결과 출력 (리스트나 제너레이터, json 외에는 받는 대로 바로 출력)"""
+    if format_type == "json":
+        results = list(results)
+        if results:
+            print(json.dumps(results, indent=2, ensure_ascii=False))
+        else:
+            print("No results found.")
         return
 
-    if format_type == "commands":
-        # 설치 명령어만 출력
-        for r in results:
-            print(r.get("install_cmd", ""))
-    elif format_type == "json":
-        print(json.dumps(results, indent=2, ensure_ascii=False))
-    else:
-        # 테이블 형식
-        print(f"\n{'Template':<55} {'Category':<15}")
-        print("-" * 75)
-        for r in results:
+    count = 0
+    scored = False
+    for r in results:
+        if format_type == "commands":
+            # 설치 명령어만 출력
+            print(r.get("install_cmd", ""), flush=True)
+        elif format_type == "ndjson":
+            # 한 줄에 결과 하나 (파이프 뒤 도구가 바로 읽을 수 있도록 즉시 flush)
+            print(json.dumps(r, ensure_ascii=False), flush=True)
+        else:
+            if count == 0:
+                # 테이블 형식 (랭킹 검색이면 점수 열 추가)
+                scored = "score" in r
+                header = f"\n{'Template':<55} {'Category':<15}"
+                print(header + (f" {'Score':>8}" if scored else ""))
+                print("-" * (84 if scored else 75))
             name = r.get("name") or r.get("path", "")
             cat = r.get("category", "")
-            print(f"{name:<55} {cat:<15}")
-        print(f"\nTotal: {len(results)} templates")
+            line = f"{name:<55} {cat:<15}"
+            if scored:
+                line += f" {r['score']:>8.3f}"
+            print(line)
+        count += 1
+
+    if count == 0 and format_type != "ndjson":  # ndjson 은 빈 스트림 그대로
+        print("No results found.")
+    elif format_type == "table":
+        print(f"\nTotal: {count} templates")
 
 
-def list_tags():
-    """사용 가능한 태그 목록"""
+def list_tags(conn: sqlite3.Connection = None, table: dict = None):
+    """사용 가능한 태그 목록 (저장소가 있으면 인덱스에 있는 템플릿 수 표시)"""
     print("\n[Available Tags]\n")
 
     # Usage tags
@@ -184,6 +865,12 @@ def list_tags():
             preview = ", ".join(items[:2])
             if len(items) > 2:
                 preview += f" (+{len(items)-2} more)"
+            if conn is not None:
+                found = sum(
+                    1 for item in items
+                    if store_has_template(conn, *item.split("/", 1))
+                )
+                preview += f" [{found}/{len(items)} indexed]"
             print(f"  {tag:<15} -> {preview}")
 
     print("\nProject Type Tags (composite):")
@@ -191,6 +878,63 @@ def list_tags():
         if any(t in TAG_MAPPINGS for t in items):
             print(f"  {tag:<15} -> {', '.join(items)}")
 
+    if table is not None:
+        print("\nDerived Tags (category, subcategory, frontmatter):")
+        for tag, paths in table["tags"].items():
+            if tag not in TAG_MAPPINGS:
+                print(f"  {tag:<15} -> {len(paths)} templates")
+
+
+def render_search(request: dict) -> bool:
+    """검색 요청 하나를 실행해 결과 출력 (CLI 와 매니저가 같이 쓰고, 캐시는 이 출력을 저장)
+
+    request 키: index, query, tags, top, format, limit, offset, match.
+    실패하면 오류를 출력하고 False
+    """
+    index_path = request.get("index") or INDEX_FILE
+    query = request.get("query") or []
+    fmt = request.get("format") or "table"
+    limit, offset = request.get("limit"), request.get("offset") or 0
+
+    if request.get("tags"):
+        results = iter_search_by_tags(request["tags"], load_tag_table(index_path))
+        print_results(paginate(results, limit, offset), fmt)
+        return True
+
+    if request.get("top"):
+        fulltext = load_sidecar(index_path, "fulltext")
+        if fulltext is None:
+            print("Error: Full-text index not found. Run sync first.")
+            return False
+        results = search_fulltext(" ".join(query), fulltext, request["top"])
+        print_results(paginate(results, limit, offset), fmt)
+        return True
+
+    conn = index = ngram = None
+    if is_sqlite_store(index_path):
+        conn = open_store(index_path)
+        if conn is None:
+            return False
+    else:
+        if len(query) == 1:
+            # posting list 에 항목 목록이 있으므로 버전만 확인하고 인덱스는 읽지 않음
+            ngram = load_sidecar(index_path, "ngram")
+        if ngram is None or len(query[0].lower()) < ngram.get("n", NGRAM_SIZE):
+            index = load_index(index_path)
+            if not index:
+                return False
+    if len(query) > 1:
+        # 여러 키워드는 인덱스 한 번 순회로 처리
+        entries = store_entries(conn) if conn is not None else index_entries(index)
+        print_batch_search(query, entries, request.get("match") or "each", fmt, limit, offset)
+    elif conn is not None:
+        results = iter_search_templates_store(query[0], conn)
+        print_results(paginate(results, limit, offset), fmt)
+    else:
+        results = iter_search_templates(query[0], index, ngram)
+        print_results(paginate(results, limit, offset), fmt)
+    return True
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -204,35 +948,46 @@ Examples:
   %(prog)s -t review security          # Multiple tags
   %(prog)s -t backend -f commands      # Output install commands only
   %(prog)s --list-tags                 # Show available tags
+  %(prog)s -i .claude/aitmpl-index.db debugger   # Search the SQLite store
+  %(prog)s -k 10 sql injection audit   # Ranked full-text search (top 10)
+  %(prog)s review --limit 20 -f ndjson # First 20 matches, one JSON object per line
+  %(prog)s sql api --match all         # Templates matching every keyword
+  %(prog)s debugger --no-cache         # Bypass the result cache
         """
     )
     parser.add_argument("query", nargs="*", help="Search query (keyword)")
     parser.add_argument("-t", "--tags", nargs="+", help="Search by tags")
-    parser.add_argument("-f", "--format", choices=["table", "commands", "json"],
-                        default="table", help="Output format")
+    parser.add_argument("-f", "--format", choices=FORMATS,
+                        default="table", help="Output format (ndjson streams one match per line)")
     parser.add_argument("-i", "--index", default=INDEX_FILE, help="Index file path")
+    parser.add_argument("--limit", type=int, metavar="N", help="Show at most N results")
+    parser.add_argument("--offset", type=int, default=0, metavar="N", help="Skip the first N results")
+    parser.add_argument("--match", choices=MATCH_MODES, default="each",
+                        help="Multiple keywords: results per keyword, any keyword (OR) or all (AND)")
     parser.add_argument("--list-tags", action="store_true", help="List available tags")
+    parser.add_argument("-k", "--top", type=int, metavar="K",
+                        help="Ranked full-text search over template content, top K results")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or store results in the search cache")
 
     args = parser.parse_args()
 
     if args.list_tags:
-        list_tags()
+        conn = open_store(args.index) if is_sqlite_store(args.index) else None
+        list_tags(conn, load_tag_table(args.index))
         return
 
-    if args.tags:
-        results = search_by_tags(args.tags)
-        print_results(results, args.format)
-    elif args.query:
-        index = load_index(args.index)
-        if not index:
-            return
-        for q in args.query:
-            results = search_templates(q, index)
-            if len(args.query) > 1:
-                print(f"\n=== Results for '{q}' ===")
-            print_results(results, args.format)
-    else:
+    if not (args.tags or args.query):
         parser.print_help()
+        return
+
+    request = vars(args)
+    if args.no_cache:
+        ok = render_search(request)
+    else:
+        ok = cached_render(args.index, request, lambda: render_search(request))
+    if not ok:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+AITMPL 검색 결과 캐시
+같은 검색을 반복할 때 인덱스를 다시 읽고 훑지 않도록 출력 결과를 SQLite 에 저장 (LRU)
+
+키: 정규화한 요청 (쿼리/태그/형식/limit/offset/match/top) + 인덱스 경로 + 인덱스 버전
+인덱스 버전은 인덱스 파일의 mtime/크기 (인덱스를 읽지 않고 확인 가능),
+save_index 가 인덱스를 저장할 때마다 캐시를 비움
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+CACHE_MAX_BYTES = 8 * 1024 * 1024
+CACHE_MAX_ENTRIES = 1000
+CACHE_TIMEOUT = 1.0
+STAT_NAMES = ("hits", "misses", "evictions", "invalidations")
+
+
+def cache_path(index_path: str) -> Path:
+    """인덱스 옆 캐시 DB 경로 (aitmpl-index.cache.db)"""
+    path = Path(index_path)
+    return path.with_name(f"{path.stem}.cache.db")
+
+
+def index_version(index_path: str) -> str:
+    """인덱스 파일 버전 (mtime_ns:크기, 파일이 없으면 None)"""
+    try:
+        stat = os.stat(index_path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def normalize_request(request: dict) -> dict:
+    """출력에 영향을 주는 요청 필드만 남김
+
+    키워드는 출력 (헤더, ndjson 의 "query") 에 그대로 나오므로 받은 그대로 키에 사용.
+    태그 검색 결과는 합친 뒤 정렬되므로 태그 순서와 중복만 무시
+    """
+    return {
+        "query": list(request.get("query") or []),
+        "tags": sorted(set(request.get("tags") or [])),
+        "top": request.get("top"),
+        "format": request.get("format", "table"),
+        "limit": request.get("limit"),
+        "offset": request.get("offset") or 0,
+        "match": request.get("match", "each"),
+    }
+
+
+class ResultCache:
+    """검색 출력 LRU 캐시 (용량/항목 수 제한, 적중/실패 통계)"""
+
+    def __init__(self, path, max_bytes: int = CACHE_MAX_BYTES, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=CACHE_TIMEOUT, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, version TEXT,"
+            " output TEXT, size INTEGER, last_used REAL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def _count(self, name: str, n: int = 1):
+        self.conn.execute(
+            "INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+            (name, n, n)
+        )
+
+    def get(self, key: str, version: str) -> str:
+        """저장된 출력 (없거나 인덱스 버전이 다르면 None)"""
+        row = self.conn.execute(
+            "SELECT output FROM entries WHERE key = ? AND version = ?", (key, version)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._count("hits")
+        return row[0]
+
+    def put(self, key: str, version: str, output: str):
+        """출력 저장 후 오래 안 쓴 항목부터 제한을 넘는 만큼 삭제"""
+        size = len(output.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 다른 버전의 인덱스로 만든 항목은 다시 쓰일 일이 없음
+            self.conn.execute("DELETE FROM entries WHERE version != ?", (version,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, version, output, size, time.time())
+            )
+            count, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            evicted = 0
+            for old_key, old_size in self.conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_used"
+            ).fetchall():
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                count, total, evicted = count - 1, total - old_size, evicted + 1
+            if evicted:
+                self._count("evictions", evicted)
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def invalidate(self):
+        """모든 항목 삭제 (통계는 유지)"""
+        self.conn.execute("DELETE FROM entries")
+        self._count("invalidations")
+
+    def stats(self) -> dict:
+        """적중/실패/삭제 횟수와 현재 크기"""
+        data = {name: 0 for name in STAT_NAMES}
+        data.update(dict(self.conn.execute("SELECT name, value FROM stats")))
+        count, total = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        data.update(entries=count, bytes=total, max_entries=self.max_entries,
+                    max_bytes=self.max_bytes)
+        return data
+
+    def clear(self):
+        """항목과 통계 모두 삭제"""
+        self.conn.execute("DELETE FROM entries")
+        self.conn.execute("DELETE FROM stats")
+
+    def close(self):
+        self.conn.close()
+
+
+def invalidate_cache(index_path: str):
+    """인덱스가 다시 저장되었으므로 캐시 비우기 (캐시가 없으면 아무것도 안 함)"""
+    path = cache_path(index_path)
+    if not path.exists():
+        return
+    try:
+        cache = ResultCache(path)
+        try:
+            cache.invalidate()
+        finally:
+            cache.close()
+    except sqlite3.Error as e:
+        print(f"Warning: search cache not invalidated: {e}")
+
+
+class _Tee(io.TextIOBase):
+    """stdout 에 그대로 쓰면서 버퍼에도 모음 (ndjson 스트리밍 유지)
+
+    모은 출력이 max_bytes 를 넘으면 어차피 저장할 수 없으므로 버퍼를 버리고
+    (buffer = None) 이후로는 stdout 에만 씀. 큰 출력도 메모리 사용이 늘지 않음
+    """
+
+    def __init__(self, stream, max_bytes: int):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.buffer = io.StringIO()
+
+    def write(self, text: str) -> int:
+        if self.buffer is not None:
+            self.size += len(text.encode("utf-8"))
+            if self.size > self.max_bytes:
+                self.buffer = None
+            else:
+                self.buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def cached_render(index_path: str, request: dict, render) -> bool:
+    """캐시에 있으면 저장된 출력을, 없으면 render() 를 실행해 출력하고 저장
+
+    render 는 결과를 stdout 에 출력하고 성공 여부를 반환 (실패한 출력은 저장 안 함).
+    캐시 DB 를 쓸 수 없으면 그냥 render() 실행
+    """
+    version = index_version(index_path)
+    if version is None:
+        return render()
+
+    key = hashlib.sha256(json.dumps(
+        [str(Path(index_path).resolve()), normalize_request(request)], sort_keys=True
+    ).encode("utf-8")).hexdigest()
+
+    try:
+        cache = ResultCache(cache_path(index_path))
+    except sqlite3.Error:
+        return render()
+
+    try:
+        try:
+            output = cache.get(key, version)
+        except sqlite3.Error:
+            output = None
+        if output is not None:
+            sys.stdout.write(output)
+            return True
+
+        tee = _Tee(sys.stdout, cache.max_bytes)
+        sys.stdout = tee
+        try:
+            ok = render()
+        finally:
+            sys.stdout = tee.stream
+        if ok and tee.buffer is not None:
+            try:
+                cache.put(key, version, tee.buffer.getvalue())
+            except sqlite3.Error:
+                pass  # 동시에 쓰는 다른 프로세스가 잠금을 잡고 있으면 이번 결과만 저장 안 함
+        return ok
+    finally:
+        cache.close()
+
+
+def print_cache_stats(index_path: str, clear: bool = False):
+    """cache-stats 출력"""
+    path = cache_path(index_path)
+    if not path.exists():
+        print(f"No search cache at {path}")
+        return
+    cache = ResultCache(path)
+    try:
+        if clear:
+            cache.clear()
+            print(f"Cleared {path}")
+            return
+        stats = cache.stats()
+    finally:
+        cache.close()
+
+    lookups = stats["hits"] + stats["misses"]
+    rate = f"{stats['hits'] / lookups:.1%}" if lookups else "-"
+    print(f"\n[Search cache: {path}]\n")
+    print(f"  Entries:       {stats['entries']} / {stats['max_entries']}")
+    print(f"  Size:          {stats['bytes'] / 1024:.1f} KiB / {stats['max_bytes'] / 1024:.0f} KiB")
+    print(f"  Hits:          {stats['hits']}")
+    print(f"  Misses:        {stats['misses']}")
+    print(f"  Hit rate:      {rate}")
+    print(f"  Evictions:     {stats['evictions']}")
+    print(f"  Invalidations: {stats['invalidations']}")
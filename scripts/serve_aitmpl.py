@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+AITMPL 검색 데몬
+인덱스(CompactIndex)와 태그 해석 결과를 메모리에 유지하고 Unix 소켓으로 요청 처리
+
+프로토콜: 연결당 JSON 요청 한 줄 -> JSON 응답 헤더 한 줄 + 출력
+  {"op": "ping"}
+  {"op": "search", "index": "/abs/index.json", "query": ["debugger"], "format": "table"}
+  {"op": "search", "index": "...", "tags": ["security"], "format": "commands"}
+  {"op": "search", "index": "...", "query": ["review"], "format": "ndjson", "limit": 20, "offset": 0}
+  {"op": "search", "index": "...", "query": ["sql", "audit"], "top": 10}
+  {"op": "search", "index": "...", "query": ["api", "sql"], "match": "all"}
+  {"op": "list-tags", "index": "..."}
+  {"op": "resolve", "index": "...", "tags": ["fullstack"]}
+응답: {"ok": true} 다음 줄부터 연결이 닫힐 때까지 검색 출력 (결과를 만드는 대로 스트리밍,
+resolve 는 헤더의 "paths"), 실패 시 {"ok": false, "error": "..."}
+요청 줄을 CLIENT_TIMEOUT 안에 보내지 않거나 출력을 읽지 않는 클라이언트는 끊음
+"""
+
+import codecs
+import io
+import json
+import os
+import signal
+import socket
+import sys
+from contextlib import redirect_stdout
+from functools import partial
+from pathlib import Path
+
+SOCKET_FILE = ".claude/aitmpl.sock"
+CONNECT_TIMEOUT = 0.2
+REQUEST_TIMEOUT = 30.0
+CLIENT_TIMEOUT = 5.0
+
+
+def query_daemon(request: dict, socket_path: str = None, out=None) -> dict:
+    """실행 중인 데몬에 요청 (데몬이 없거나 응답이 실패면 None)
+
+    응답 헤더를 반환하고, 이어지는 출력은 받는 대로 out (텍스트 스트림) 에 씀.
+    출력을 쓰기 시작한 뒤 연결이 끊기면 (이미 일부를 출력했으므로) 헤더를 그대로 반환
+    """
+    path = socket_path or SOCKET_FILE
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+
+    response = None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(REQUEST_TIMEOUT)
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile("rb") as stream:
+                header = json.loads(stream.readline().decode("utf-8"))
+                if not header.get("ok"):
+                    return None
+                response = header
+                decoder = codecs.getincrementaldecoder("utf-8")()
+                while True:
+                    chunk = stream.read1(65536)
+                    if out is not None:
+                        out.write(decoder.decode(chunk, final=not chunk))
+                    if not chunk:
+                        break
+    except (OSError, ValueError):
+        pass
+
+    return response
+
+
+class IndexState:
+    """메모리에 유지되는 인덱스 (파일이 바뀌면 다시 로드)"""
+
+    def __init__(self, index_path: str):
+        self.index_path = str(Path(index_path).resolve())
+        self.stamp = None
+        self.index = {}
+        self.ngram = None
+        self.fulltext = None
+        self.tags = None
+
+    def file_stamp(self) -> tuple:
+        """인덱스와 사이드카 파일들의 (mtime, 크기), 인덱스가 없으면 None"""
+        from search_aitmpl import sidecar_path
+
+        paths = [self.index_path] + [sidecar_path(self.index_path, kind)
+                                     for kind in ("ngram", "fulltext", "tags")]
+        stamp = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                if path == self.index_path:
+                    return None
+                stamp.append(None)
+        return tuple(stamp)
+
+    def refresh(self):
+        """인덱스나 사이드카 파일의 mtime/크기가 바뀌었으면 다시 로드
+
+        태그/전문 사이드카는 인덱스가 그대로여도 다시 쓰일 수 있으므로 함께 확인
+        """
+        from search_aitmpl import load_index, load_sidecar, load_tag_table
+
+        stamp = self.file_stamp()
+        if stamp is None:
+            self.stamp, self.index, self.ngram, self.fulltext, self.tags = None, {}, None, None, None
+            return
+        if stamp == self.stamp:
+            return
+
+        self.index = load_index(self.index_path, compact=True)
+        self.ngram = load_sidecar(self.index_path, "ngram", self.index)
+        self.fulltext = load_sidecar(self.index_path, "fulltext", self.index)
+        self.tags = load_tag_table(self.index_path)
+        self.stamp = stamp
+        print(f"Loaded {self.index_path} ({self.index.get('updated_at', 'unknown')})", flush=True)
+
+
+def handle_request(state: IndexState, request: dict) -> tuple:
+    """요청 하나 처리 -> (응답 헤더, 출력을 stdout 에 쓰는 render 또는 None)
+
+    render 는 헤더를 보낸 뒤 stdout 을 소켓으로 돌려 실행하므로 결과가 만들어지는 대로 전송됨
+    """
+    from search_aitmpl import (
+        index_entries, iter_search_by_tags, iter_search_templates, list_tags, paginate,
+        print_batch_search, print_results, search_by_tags, search_fulltext
+    )
+
+    op = request.get("op")
+    if op == "ping":
+        return {"ok": True, "index": state.index_path}, None
+    if op not in ("list-tags", "resolve", "search"):
+        return {"ok": False, "error": f"unknown op: {op}"}, None
+
+    # 다른 인덱스를 요청하면 클라이언트가 직접 처리
+    if request.get("index") and str(Path(request["index"]).resolve()) != state.index_path:
+        return {"ok": False, "error": "index mismatch"}, None
+
+    state.refresh()
+    if op == "list-tags":
+        return {"ok": True}, partial(list_tags, None, state.tags)
+
+    fmt = request.get("format", "table")
+    limit, offset = request.get("limit"), request.get("offset") or 0
+    if op == "resolve":
+        results = search_by_tags(request.get("tags", []), state.tags)
+        return {"ok": True, "paths": [r["path"] for r in results]}, None
+    if request.get("tags"):
+        results = iter_search_by_tags(request["tags"], state.tags)
+        return {"ok": True}, partial(print_results, paginate(results, limit, offset), fmt)
+
+    if not state.index:
+        return {"ok": False, "error": "index not loaded"}, None
+
+    query = request.get("query") or []
+    if request.get("top"):
+        if state.fulltext is None:
+            return {"ok": False, "error": "full-text index not loaded"}, None
+        results = search_fulltext(" ".join(query), state.fulltext, request["top"])
+        return {"ok": True}, partial(print_results, paginate(results, limit, offset), fmt)
+
+    if len(query) > 1:
+        entries = index_entries(state.index)
+        match = request.get("match", "each")
+        return {"ok": True}, partial(
+            print_batch_search, query, entries, match, fmt, limit, offset
+        )
+
+    if not query:
+        return {"ok": False, "error": "empty query"}, None
+    results = iter_search_templates(query[0], state.index, state.ngram)
+    return {"ok": True}, partial(print_results, paginate(results, limit, offset), fmt)
+
+
+def serve(index_path: str, socket_path: str = None):
+    """데몬 실행 (포그라운드, Ctrl+C 로 종료)"""
+    import socketserver
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: Unix sockets are not supported on this platform")
+        sys.exit(1)
+
+    path = socket_path or SOCKET_FILE
+    if os.path.exists(path):
+        if query_daemon({"op": "ping"}, path) is not None:
+            print(f"Error: daemon already running on {path}")
+            sys.exit(1)
+        os.unlink(path)  # 이전 실행이 남긴 소켓
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    state = IndexState(index_path)
+    state.refresh()
+
+    class Handler(socketserver.StreamRequestHandler):
+        # 소켓 읽기/쓰기 제한 시간, 요청 줄을 보내지 않거나 출력을 읽지 않는 클라이언트가
+        # 단일 스레드 데몬을 붙잡지 못하도록
+        timeout = CLIENT_TIMEOUT
+
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline().decode("utf-8"))
+                response, render = handle_request(state, request)
+            except socket.timeout:
+                return  # 요청을 보내지 않는 클라이언트
+            except Exception as e:  # 요청 하나의 실패로 데몬이 죽지 않도록
+                response, render = {"ok": False, "error": str(e)}, None
+            try:
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                if render is not None:
+                    out = io.TextIOWrapper(self.wfile, encoding="utf-8", newline="\n")
+                    try:
+                        with redirect_stdout(out):
+                            render()
+                        out.flush()
+                    finally:
+                        out.detach()
+            except OSError:
+                pass  # 클라이언트가 끊었거나 읽지 않아 시간 초과
+
+    # 요청이 짧으므로 단일 스레드로 순서대로 처리 (상태 공유에 락 불필요)
+    server = socketserver.UnixStreamServer(path, Handler)
+    print(f"AITMPL daemon listening on {path}", flush=True)
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        print("\nDaemon stopped.")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve AITMPL searches from a resident process")
+    parser.add_argument("-i", "--index", default=".claude/aitmpl-index.json", help="Index file path")
+    parser.add_argument("-s", "--socket", default=SOCKET_FILE, help="Unix socket path")
+
+    args = parser.parse_args()
+    serve(args.index, args.socket)
+
+
+if __name__ == "__main__":
+    main()
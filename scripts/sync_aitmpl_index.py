@@ -4,28 +4,160 @@ AITMPL 템플릿 자동 인덱싱 스크립트
 Git clone 방식으로 rate limit 없이 전체 목록 가져오기
 """
 
+import asyncio
+import cProfile
 import json
 import os
+import re
 import shutil
+import sqlite3
 import subprocess
+import sys
+import tarfile
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 
+from search_aitmpl import (
+    build_fulltext_index, build_ngram_index, build_tag_table, index_updated_at, load_index,
+    load_sidecar, sidecar_documents, sidecar_path, write_sqlite_store
+)
+from search_cache import invalidate_cache
+from template_store import STORE_DIR, git_blob_id, has_object, save_manifest, write_object
+
 REPO_URL = "https://github.com/davila7/claude-code-templates.git"
 COMPONENTS_PATH = "cli-tool/components"
 OUTPUT_FILE = ".claude/aitmpl-index.json"
+MIRROR_DIR = ".claude/aitmpl-mirror"
+
+STORES = ["json", "sqlite", "both"]
 
 CATEGORIES = ["agents", "commands", "hooks", "mcps", "skills", "settings"]
+TEMPLATE_SUFFIXES = (".md", ".json")
+SIDECAR_VERSION_RE = re.compile(rb'"index_version":\s*("(?:[^"\\]|\\.)*")')
+FRONTMATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.S)
+
+
+class SyncMetrics:
+    """Wall time and counters per phase and per category for one sync run
+
+    Counters are cheap enough to always collect; ``--metrics`` writes them as
+    JSON and ``--profile`` adds a cProfile dump of the scan (worker threads
+    included: one profiler per thread up to Python 3.11, a single
+    interpreter-wide one from 3.12).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.categories = {}
+        self.profilers = None
+        self.local = threading.local()
+
+    def add(self, phase: str, **counters):
+        with self.lock:
+            bucket = self.phases.setdefault(phase, {})
+            for key, value in counters.items():
+                bucket[key] = bucket.get(key, 0) + value
+
+    def add_category(self, category: str, **counters):
+        with self.lock:
+            bucket = self.categories.setdefault(category, {})
+            for key, value in counters.items():
+                bucket[key] = bucket.get(key, 0) + value
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase (nested or repeated phases accumulate)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, seconds=time.perf_counter() - start)
+
+    def start_profiling(self):
+        self.profilers = []
+
+    def profiled(self, func):
+        """Run func under a per-thread profiler while profiling is on
+
+        Python 3.12+ allows only one active profiler per interpreter, and that
+        one already covers every thread. When enabling fails there (or another
+        profiling tool is running) func simply runs unprofiled.
+        """
+        if self.profilers is None:
+            return func
+
+        def wrapper(*args, **kwargs):
+            if getattr(self.local, "active", False):
+                return func(*args, **kwargs)  # already profiled further up this thread
+            profiler = getattr(self.local, "profiler", None)
+            if profiler is None:
+                profiler = self.local.profiler = cProfile.Profile()
+                with self.lock:
+                    self.profilers.append(profiler)
+            try:
+                profiler.enable()
+            except ValueError:
+                return func(*args, **kwargs)
+            self.local.active = True
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                self.local.active = False
+        return wrapper
+
+    def dump_profile(self, path: str):
+        import pstats
+
+        profilers = [p for p in self.profilers or [] if p.getstats()]
+        if not profilers:
+            print("Warning: no profile collected (another profiler was active)")
+            return
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+
+    def to_dict(self) -> dict:
+        def rounded(bucket):
+            return {k: round(v, 6) if isinstance(v, float) else v for k, v in bucket.items()}
+
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 6),
+            "phases": {name: rounded(b) for name, b in self.phases.items()},
+            "categories": {name: rounded(b) for name, b in self.categories.items()},
+        }
+
+
+METRICS = SyncMetrics()
+
+
+def dir_size(path) -> int:
+    """Total size of the files below a directory (0 if missing)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
 
 
-def clone_repo(temp_dir: str) -> bool:
+def clone_repo(temp_dir: str, repo_url: str = REPO_URL) -> bool:
     """Git clone (shallow) - no rate limit!"""
     try:
         print("Cloning repository (shallow)...")
         # Simple shallow clone without sparse checkout for full access
         subprocess.run(
-            ["git", "clone", "--depth", "1", REPO_URL, temp_dir],
+            ["git", "clone", "--depth", "1", repo_url, temp_dir],
             check=True,
             capture_output=True,
             text=True
@@ -41,8 +173,64 @@ def clone_repo(temp_dir: str) -> bool:
         return False
 
 
-def scan_category(base_path: Path, category: str) -> dict:
-    """Scan local directory for templates (handles nested skill folders)"""
+def run_git(args: list, cwd: str) -> str:
+    """Run a git command and return its stdout"""
+    result = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    return result.stdout.strip()
+
+
+def head_commit(repo_dir: str) -> str:
+    """Commit the checkout is at (None if unavailable)"""
+    try:
+        return run_git(["rev-parse", "HEAD"], repo_dir)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def scan_subdir(subdir: Path) -> list:
+    """Scan one category subdirectory (handles nested skill folders)"""
+    templates = []
+    # Check for direct files
+    for file in sorted(subdir.iterdir()):
+        if file.is_file() and file.suffix in [".md", ".json"]:
+            templates.append({
+                "name": file.stem,
+                "file": file.name,
+                "size": file.stat().st_size
+            })
+        # Handle nested folders (for skills)
+        elif file.is_dir():
+            skill_file = file / "SKILL.md"
+            if skill_file.exists():
+                templates.append({
+                    "name": file.name,
+                    "file": f"{file.name}/SKILL.md",
+                    "size": skill_file.stat().st_size
+                })
+            else:
+                # Check for any .md file in nested folder
+                for nested_file in file.iterdir():
+                    if nested_file.is_file() and nested_file.suffix in [".md", ".json"]:
+                        templates.append({
+                            "name": f"{file.name}/{nested_file.stem}",
+                            "file": f"{file.name}/{nested_file.name}",
+                            "size": nested_file.stat().st_size
+                        })
+    return templates
+
+
+def scan_category(base_path: Path, category: str, reuse: dict = None) -> dict:
+    """Scan local directory for templates (handles nested skill folders)
+
+    Subdirectories listed in ``reuse`` are taken from the previous index
+    instead of being scanned again.
+    """
     items = {}
     category_path = base_path / COMPONENTS_PATH / category
 
@@ -51,33 +239,10 @@ def scan_category(base_path: Path, category: str) -> dict:
 
     for subdir in sorted(category_path.iterdir()):
         if subdir.is_dir():
-            templates = []
-            # Check for direct files
-            for file in sorted(subdir.iterdir()):
-                if file.is_file() and file.suffix in [".md", ".json"]:
-                    templates.append({
-                        "name": file.stem,
-                        "file": file.name,
-                        "size": file.stat().st_size
-                    })
-                # Handle nested folders (for skills)
-                elif file.is_dir():
-                    skill_file = file / "SKILL.md"
-                    if skill_file.exists():
-                        templates.append({
-                            "name": file.name,
-                            "file": f"{file.name}/SKILL.md",
-                            "size": skill_file.stat().st_size
-                        })
-                    else:
-                        # Check for any .md file in nested folder
-                        for nested_file in file.iterdir():
-                            if nested_file.is_file() and nested_file.suffix in [".md", ".json"]:
-                                templates.append({
-                                    "name": f"{file.name}/{nested_file.stem}",
-                                    "file": f"{file.name}/{nested_file.name}",
-                                    "size": nested_file.stat().st_size
-                                })
+            if reuse and subdir.name in reuse:
+                templates = reuse[subdir.name]
+            else:
+                templates = scan_subdir(subdir)
             if templates:
                 items[subdir.name] = templates
         elif subdir.is_file() and subdir.suffix in [".md", ".json"]:
@@ -92,13 +257,389 @@ def scan_category(base_path: Path, category: str) -> dict:
     return items
 
 
-def build_index_from_clone() -> dict:
-    """Build index using git clone (no rate limit)"""
+def _template_suffix(name: str) -> str:
+    """Template suffix of a file name ('' if not a template file)"""
+    suffix = os.path.splitext(name)[1]
+    return suffix if suffix in TEMPLATE_SUFFIXES else ""
+
+
+def _entry_stat(entry: os.DirEntry):
+    """Stat a DirEntry, returning None when it does not exist (broken symlink)"""
+    try:
+        return entry.stat()
+    except OSError:
+        return None
+
+
+def scan_subdir_fast(subdir_path: str, counters: dict = None) -> list:
+    """scandir-based equivalent of scan_subdir (one listing per directory)
+
+    ``counters`` receives scandir_calls, stat_calls and entries when given.
+    """
+    templates = []
+    scandirs = stats = 1
+    with os.scandir(subdir_path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    seen = len(entries)
+
+    for entry in entries:
+        suffix = _template_suffix(entry.name)
+        if entry.is_file() and suffix:
+            stats += 1
+            templates.append({
+                "name": entry.name[:-len(suffix)],
+                "file": entry.name,
+                "size": entry.stat().st_size
+            })
+        elif entry.is_dir():
+            # Keep directory order here, scan_subdir does not sort nested files
+            with os.scandir(entry.path) as it:
+                nested = list(it)
+            scandirs += 1
+            seen += len(nested)
+            skill_stat = None
+            for nested_entry in nested:
+                if nested_entry.name == "SKILL.md":
+                    skill_stat = _entry_stat(nested_entry)
+                    stats += 1
+                    break
+            if skill_stat is not None:
+                templates.append({
+                    "name": entry.name,
+                    "file": f"{entry.name}/SKILL.md",
+                    "size": skill_stat.st_size
+                })
+            else:
+                for nested_entry in nested:
+                    nested_suffix = _template_suffix(nested_entry.name)
+                    if nested_entry.is_file() and nested_suffix:
+                        stats += 1
+                        templates.append({
+                            "name": f"{entry.name}/{nested_entry.name[:-len(nested_suffix)]}",
+                            "file": f"{entry.name}/{nested_entry.name}",
+                            "size": nested_entry.stat().st_size
+                        })
+
+    if counters is not None:
+        counters["scandir_calls"] = counters.get("scandir_calls", 0) + scandirs
+        counters["stat_calls"] = counters.get("stat_calls", 0) + stats
+        counters["entries"] = counters.get("entries", 0) + seen
+    return templates
+
+
+def _scan_subdir_measured(category: str, subdir_path: str) -> list:
+    """scan_subdir_fast recording its time and counters under the category"""
+    counters = {}
+    start = time.perf_counter()
+    templates = scan_subdir_fast(subdir_path, counters)
+    METRICS.add_category(category, scan_seconds=time.perf_counter() - start,
+                         subdirs=1, templates=len(templates), **counters)
+    return templates
+
+
+def _list_category(category_path: str) -> list:
+    """Sorted top-level entries of a category (empty if it does not exist)"""
+    if not os.path.exists(category_path):
+        return []
+    with os.scandir(category_path) as it:
+        return sorted(it, key=lambda e: e.name)
+
+
+def scan_categories(base_path: Path, categories: list = None, reuse: dict = None,
+                    workers: int = None) -> dict:
+    """Scan categories and their subdirectories on a thread pool
+
+    Produces exactly the same dicts as calling scan_category per category.
+    ``reuse`` maps category -> {subdir: templates} taken from a previous index.
+    """
+    if categories is None:
+        categories = CATEGORIES
+    reuse = reuse or {}
+    components = os.path.join(str(base_path), COMPONENTS_PATH)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        listings = list(pool.map(
+            _list_category, [os.path.join(components, c) for c in categories]
+        ))
+
+        # Submit every subdirectory of every category before collecting any
+        pending = []
+        for category, entries in zip(categories, listings):
+            category_reuse = reuse.get(category) or {}
+            METRICS.add_category(category, scandir_calls=1, entries=len(entries))
+            plan = []
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.name in category_reuse:
+                        plan.append((entry, category_reuse[entry.name]))
+                        METRICS.add_category(category, reused_subdirs=1)
+                    else:
+                        plan.append((entry, pool.submit(
+                            METRICS.profiled(_scan_subdir_measured), category, entry.path
+                        )))
+                elif entry.is_file() and _template_suffix(entry.name):
+                    plan.append((entry, None))
+            pending.append((category, plan))
+
+        result = {}
+        for category, plan in pending:
+            items = {}
+            for entry, templates in plan:
+                if templates is None:
+                    METRICS.add_category(category, stat_calls=1, templates=1)
+                    suffix = _template_suffix(entry.name)
+                    items.setdefault("root", []).append({
+                        "name": entry.name[:-len(suffix)],
+                        "file": entry.name,
+                        "size": entry.stat().st_size
+                    })
+                    continue
+                if not isinstance(templates, list):
+                    templates = templates.result()
+                if templates:
+                    items[entry.name] = templates
+            result[category] = items
+
+    return result
+
+
+class ListingDir(dict):
+    """Directory node of a file listing (file nodes are plain record dicts)"""
+
+
+def _listing_tree(files) -> ListingDir:
+    """Nested tree of a file listing
+
+    ``files`` yields (parts, record) where parts is the path split on "/"
+    relative to the components directory.
+    """
+    tree = ListingDir()
+    for parts, record in files:
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, ListingDir())
+            if not isinstance(node, ListingDir):
+                break  # a file and a directory with the same name
+        else:
+            node.setdefault(parts[-1], record)
+    return tree
+
+
+def _listing_template(name: str, file: str, record: dict) -> dict:
+    """Template entry for a listed file (record holds size and optional extra fields)"""
+    return {"name": name, "file": file, **record}
+
+
+def scan_listing_subdir(node: ListingDir) -> list:
+    """scan_subdir equivalent for a listing node (nested files sorted by name)"""
+    templates = []
+    for name in sorted(node):
+        child = node[name]
+        if not isinstance(child, ListingDir):
+            suffix = _template_suffix(name)
+            if suffix:
+                templates.append(_listing_template(name[:-len(suffix)], name, child))
+            continue
+
+        skill = child.get("SKILL.md")
+        if skill is not None and not isinstance(skill, ListingDir):
+            templates.append(_listing_template(name, f"{name}/SKILL.md", skill))
+        else:
+            for nested_name in sorted(child):
+                nested = child[nested_name]
+                nested_suffix = _template_suffix(nested_name)
+                if nested_suffix and not isinstance(nested, ListingDir):
+                    templates.append(_listing_template(
+                        f"{name}/{nested_name[:-len(nested_suffix)]}",
+                        f"{name}/{nested_name}",
+                        nested
+                    ))
+    return templates
+
+
+def build_categories_from_listing(files, categories: list = None) -> dict:
+    """Build the categories structure from a file listing instead of a checkout
+
+    Applies the same rules as scan_category (sorted entries, "root" for files
+    directly in a category, SKILL.md folders, nested template files).
+    ``files`` yields (path relative to COMPONENTS_PATH, record) pairs where
+    record is a dict with at least "size".
+    """
+    if categories is None:
+        categories = CATEGORIES
+    tree = _listing_tree((path.split("/"), record) for path, record in files)
+
+    result = {}
+    for category in categories:
+        items = {}
+        category_node = tree.get(category)
+        if isinstance(category_node, ListingDir):
+            for name in sorted(category_node):
+                child = category_node[name]
+                if isinstance(child, ListingDir):
+                    templates = scan_listing_subdir(child)
+                    if templates:
+                        items[name] = templates
+                elif _template_suffix(name):
+                    items.setdefault("root", []).append(_listing_template(
+                        name[:-len(_template_suffix(name))], name, child
+                    ))
+        result[category] = items
+    return result
+
+
+def _components_relpath(member_path: str) -> str:
+    """Path below COMPONENTS_PATH, wherever the archive roots it (None if outside)"""
+    marker = COMPONENTS_PATH + "/"
+    path = member_path[2:] if member_path.startswith("./") else member_path
+    pos = path.find(marker)
+    if pos < 0 or (pos > 0 and path[pos - 1] != "/"):
+        return None
+    return path[pos + len(marker):] or None
+
+
+def parse_frontmatter(text: str) -> tuple:
+    """Split simple YAML frontmatter from a markdown body -> (meta, body)
+
+    Handles ``key: value``, inline ``[a, b]`` lists and ``- item`` lists,
+    which is all the upstream templates use.
+    """
+    match = FRONTMATTER_RE.match(text)
+    if not match:
+        return {}, text
+
+    meta = {}
+    key = None
+    for line in match.group(1).splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key and isinstance(meta.get(key), list):
+            meta[key].append(stripped[2:].strip().strip("'\""))
+        elif ":" in line and not line[0].isspace():
+            key, value = line.split(":", 1)
+            key, value = key.strip(), value.strip()
+            if value.startswith("[") and value.endswith("]"):
+                meta[key] = [v.strip().strip("'\"") for v in value[1:-1].split(",") if v.strip()]
+            elif value:
+                meta[key] = value.strip("'\"")
+            else:
+                meta[key] = []
+    return meta, text[match.end():]
+
+
+def _json_strings(value) -> list:
+    """All string values of a parsed JSON document"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [s for v in value.values() for s in _json_strings(v)]
+    if isinstance(value, list):
+        return [s for v in value for s in _json_strings(v)]
+    return []
+
+
+def extract_document(category: str, subcat: str, tmpl: dict, text: str) -> dict:
+    """Searchable fields of one template (description, tags, body text)"""
+    description = ""
+    tags = []
+    body = text
+
+    if tmpl["file"].endswith(".json"):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict):
+            description = data.get("description") or ""
+            tags = data.get("tags") or []
+            body = " ".join(_json_strings({k: v for k, v in data.items() if k != "description"}))
+    else:
+        meta, body = parse_frontmatter(text)
+        description = meta.get("description") or ""
+        tags = meta.get("tags") or meta.get("keywords") or []
+
+    if isinstance(description, list):
+        description = " ".join(description)
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(",") if t.strip()]
+
+    METRICS.add_category(category, documents=1, document_chars=len(text))
+    return {
+        "category": category,
+        "subcategory": subcat,
+        "name": tmpl["name"],
+        "description": description,
+        "tags": [str(t) for t in tags],
+        "body": body,
+    }
+
+
+def template_relpath(category: str, subcat: str, tmpl: dict) -> str:
+    """Path of a template file relative to COMPONENTS_PATH"""
+    if subcat == "root":
+        return f"{category}/{tmpl['file']}"
+    return f"{category}/{subcat}/{tmpl['file']}"
+
+
+def template_file_path(base_path: Path, category: str, subcat: str, tmpl: dict) -> Path:
+    """Location of a template file inside a checkout"""
+    return Path(base_path) / COMPONENTS_PATH / template_relpath(category, subcat, tmpl)
+
+
+def extract_documents(base_path: Path, categories: dict, workers: int = None) -> list:
+    """Read every indexed template from a checkout and extract its document"""
+    entries = [
+        (category, subcat, tmpl)
+        for category, subcats in categories.items()
+        for subcat, templates in subcats.items()
+        for tmpl in templates
+    ]
+
+    def read(entry):
+        category, subcat, tmpl = entry
+        try:
+            text = template_file_path(base_path, category, subcat, tmpl).read_text(
+                encoding="utf-8", errors="replace"
+            )
+        except OSError:
+            text = ""
+        return extract_document(category, subcat, tmpl, text)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read, entries))
+
+
+def extract_documents_from_contents(categories: dict, contents: dict) -> list:
+    """extract_documents for file contents held in memory (keyed by template_relpath)"""
+    return [
+        extract_document(
+            category, subcat, tmpl,
+            contents.get(template_relpath(category, subcat, tmpl), b"").decode(
+                "utf-8", errors="replace"
+            )
+        )
+        for category, subcats in categories.items()
+        for subcat, templates in subcats.items()
+        for tmpl in templates
+    ]
+
+
+def build_index_from_clone(repo_url: str = REPO_URL, documents: list = None,
+                           store_dir: str = None) -> dict:
+    """Build index using git clone (no rate limit)
+
+    If ``documents`` is a list, the extracted template documents used for
+    full-text search are appended to it before the checkout is removed.
+    With ``store_dir`` the component files are kept in the template store.
+    Returns None if the clone fails, an empty index would overwrite a good one.
+    """
     index = {
         "version": "1.0",
         "updated_at": datetime.now().isoformat(),
         "source": "https://github.com/davila7/claude-code-templates",
         "method": "git-clone",
+        "commit": None,
         "categories": {}
     }
 
@@ -106,26 +647,939 @@ def build_index_from_clone() -> dict:
     temp_dir = tempfile.mkdtemp(prefix="aitmpl_")
 
     try:
-        if not clone_repo(temp_dir):
-            print("Failed to clone. Returning empty index.")
-            return index
+        with METRICS.phase("clone"):
+            cloned = clone_repo(temp_dir, repo_url)
+        if not cloned:
+            print("Failed to clone.")
+            return None
+        METRICS.add("clone", bytes=dir_size(Path(temp_dir) / ".git"))
+
+        index["commit"] = head_commit(temp_dir)
 
-        base_path = Path(temp_dir)
+        print(f"Scanning {', '.join(CATEGORIES)}...")
+        with METRICS.phase("scan"):
+            index["categories"] = METRICS.profiled(scan_categories)(Path(temp_dir), CATEGORIES)
+        with METRICS.phase("hash"):
+            hash_templates(Path(temp_dir), index["categories"], checkout_blob_ids(temp_dir))
 
-        for category in CATEGORIES:
-            print(f"Scanning {category}...")
-            index["categories"][category] = scan_category(base_path, category)
+        if documents is not None:
+            print("Extracting template documents...")
+            with METRICS.phase("extract"):
+                documents.extend(extract_documents(Path(temp_dir), index["categories"]))
+
+        if store_dir:
+            _update_store_safely(store_dir, temp_dir, index["commit"])
 
     finally:
         # Cleanup
         print("Cleaning up temp files...")
+        with METRICS.phase("cleanup"):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return index
+
+
+def update_mirror(mirror_dir: str, repo_url: str = REPO_URL) -> bool:
+    """Clone the mirror on first use, otherwise fetch and reset to upstream HEAD"""
+    if not (Path(mirror_dir) / ".git").exists():
+        Path(mirror_dir).parent.mkdir(parents=True, exist_ok=True)
+        return clone_repo(mirror_dir, repo_url)
+
+    try:
+        print("Fetching mirror...")
+        run_git(["fetch", "--depth", "1", "origin", "HEAD"], mirror_dir)
+        run_git(["reset", "--hard", "FETCH_HEAD"], mirror_dir)
+        run_git(["clean", "-fdx"], mirror_dir)
+        print("Fetch complete!")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Git fetch failed: {e}")
+        print(f"stderr: {e.stderr}")
+        return False
+    except FileNotFoundError:
+        print("Git not found. Please install git.")
+        return False
+
+
+def changed_subdirs(mirror_dir: str, old_commit: str, new_commit: str) -> set:
+    """(category, subdir) pairs whose trees differ between two commits
+
+    Returns None when the old commit cannot be obtained, which means the
+    previous index cannot be trusted and everything must be rescanned.
+    """
+    try:
+        run_git(["cat-file", "-e", f"{old_commit}^{{commit}}"], mirror_dir)
+    except subprocess.CalledProcessError:
+        # Index was built on another machine - fetch just that commit
+        try:
+            run_git(["fetch", "--depth", "1", "origin", old_commit], mirror_dir)
+        except subprocess.CalledProcessError:
+            return None
+
+    try:
+        output = run_git(
+            ["diff", "--name-only", "--no-renames", old_commit, new_commit,
+             "--", COMPONENTS_PATH],
+            mirror_dir
+        )
+    except subprocess.CalledProcessError:
+        return None
+
+    changed = set()
+    prefix_len = len(Path(COMPONENTS_PATH).parts)
+    for line in output.splitlines():
+        parts = Path(line).parts[prefix_len:]
+        # Root-level files are always re-read, only subdirs can be reused
+        if len(parts) >= 3:
+            changed.add((parts[0], parts[1]))
+    return changed
+
+
+def build_index_from_tree(repo_url: str = REPO_URL, documents: list = None,
+                          store_dir: str = None) -> dict:
+    """Build index from a blobless clone's tree objects, without a checkout
+
+    Paths and blob IDs come from ``git ls-tree``. Only the blobs of files that
+    end up as templates are fetched, in a single batch, to get their sizes
+    (and contents when ``documents`` is a list). Returns None if git fails.
+    """
+    index = {
+        "version": "1.0",
+        "updated_at": datetime.now().isoformat(),
+        "source": "https://github.com/davila7/claude-code-templates",
+        "method": "git-tree",
+        "commit": None,
+        "categories": {}
+    }
+
+    temp_dir = tempfile.mkdtemp(prefix="aitmpl_tree_")
+
+    try:
+        print("Cloning repository (blobless, no checkout)...")
+        with METRICS.phase("clone"):
+            run_git(["clone", "--quiet", "--filter=blob:none", "--no-checkout", "--depth", "1",
+                     repo_url, temp_dir], ".")
+        git_dir = Path(temp_dir) / ".git"
+        cloned_bytes = dir_size(git_dir)
+        METRICS.add("clone", bytes=cloned_bytes)
+        index["commit"] = head_commit(temp_dir)
+
+        with METRICS.phase("ls-tree"):
+            entries = parse_ls_tree(
+                run_git(["ls-tree", "-r", "-z", "HEAD", "--", COMPONENTS_PATH], temp_dir),
+                long=False
+            )
+        METRICS.add("ls-tree", entries=len(entries))
+        oids = {relpath: oid for relpath, oid, _ in entries}
+        # Which files are templates only depends on the paths
+        listing = build_categories_from_listing((relpath, {}) for relpath, _, _ in entries)
+        wanted = sorted({
+            oids[template_relpath(category, subcat, tmpl)]
+            for category, subcats in listing.items()
+            for subcat, templates in subcats.items()
+            for tmpl in templates
+        })
+
+        print(f"Fetching {len(wanted)} template blobs...")
+        with METRICS.phase("fetch-blobs"):
+            fetch_blobs(temp_dir, wanted)
+            if documents is not None:
+                blobs = read_blobs(temp_dir, wanted)
+                sizes = {oid: len(data) for oid, data in blobs.items()}
+            else:
+                blobs = {}
+                sizes = read_blob_sizes(temp_dir, wanted)
+        METRICS.add("fetch-blobs", bytes=max(0, dir_size(git_dir) - cloned_bytes),
+                    blobs=len(wanted))
+
+        print(f"Indexing {', '.join(CATEGORIES)} from tree listing...")
+        with METRICS.phase("scan"):
+            index["categories"] = METRICS.profiled(build_categories_from_listing)(
+                ((relpath, {"size": sizes.get(oid, 0), "hash": oid})
+                 for relpath, oid, _ in entries),
+                CATEGORIES
+            )
+
+        if documents is not None:
+            print("Extracting template documents...")
+            with METRICS.phase("extract"):
+                contents = {relpath: blobs.get(oid, b"") for relpath, oid in oids.items()}
+                documents.extend(extract_documents_from_contents(index["categories"], contents))
+
+        if store_dir:
+            # Skill folders need their non-template files too, fetched in one more batch
+            _update_store_safely(store_dir, temp_dir, index["commit"], fetch_missing=True)
+
+    except subprocess.CalledProcessError as e:
+        print(f"Blobless clone failed: {e}")
+        print(f"stderr: {e.stderr}")
+        return None
+    except FileNotFoundError:
+        print("Git not found. Please install git.")
+        return None
+    finally:
+        print("Cleaning up temp files...")
+        with METRICS.phase("cleanup"):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return index
+
+
+def carry_over_documents(index_path: str, previous: dict, keys: set) -> dict:
+    """Documents of ``keys`` ((category, subdir) pairs) rebuilt from the saved sidecars
+
+    None when the full-text or tag sidecar is missing or was not built for
+    ``previous``, then everything has to be extracted again.
+    """
+    fulltext = load_sidecar(index_path, "fulltext", previous)
+    tags = load_sidecar(index_path, "tags", previous)
+    if fulltext is None or tags is None:
+        return None
+    return sidecar_documents(fulltext, tags, keys)
+
+
+def extract_changed_documents(base_path: Path, categories: dict, carried: dict) -> list:
+    """extract_documents that reads only subdirs missing from ``carried`` (index order)"""
+    changed = {
+        category: {subcat: templates for subcat, templates in subcats.items()
+                   if (category, subcat) not in carried}
+        for category, subcats in categories.items()
+    }
+    extracted = {}
+    for doc in extract_documents(base_path, changed):
+        extracted.setdefault((doc["category"], doc["subcategory"]), []).append(doc)
+    METRICS.add("extract", carried=sum(len(docs) for docs in carried.values()))
+    return [
+        doc
+        for category, subcats in categories.items()
+        for subcat in subcats
+        for doc in carried.get((category, subcat)) or extracted.get((category, subcat), [])
+    ]
+
+
+def build_index_from_mirror(mirror_dir: str = MIRROR_DIR, previous: dict = None,
+                            repo_url: str = REPO_URL, documents: list = None,
+                            store_dir: str = None, previous_path: str = None) -> dict:
+    """Build index from a persistent mirror, rescanning only changed subdirs
+
+    With ``previous_path`` (where ``previous`` was saved) the documents of
+    unchanged subdirs are taken from its full-text and tag sidecars, so only
+    changed subdirs are read again. Returns None if the mirror cannot be
+    cloned or fetched.
+    """
+    index = {
+        "version": "1.0",
+        "updated_at": datetime.now().isoformat(),
+        "source": "https://github.com/davila7/claude-code-templates",
+        "method": "git-mirror",
+        "commit": None,
+        "categories": {}
+    }
+
+    git_dir = Path(mirror_dir) / ".git"
+    size_before = dir_size(git_dir)
+    with METRICS.phase("fetch"):
+        updated = update_mirror(mirror_dir, repo_url)
+    if not updated:
+        print("Failed to update mirror.")
+        return None
+    # Pack growth approximates what was transferred (gc can make it negative)
+    METRICS.add("fetch", bytes=max(0, dir_size(git_dir) - size_before))
+
+    commit = head_commit(mirror_dir)
+    index["commit"] = commit
+
+    changed = None
+    old_commit = (previous or {}).get("commit")
+    if old_commit and commit:
+        with METRICS.phase("diff"):
+            changed = changed_subdirs(mirror_dir, old_commit, commit)
+        if changed is None:
+            print(f"Previous commit {old_commit[:12]} unavailable, full rescan.")
+        else:
+            print(f"{old_commit[:12]}..{commit[:12]}: {len(changed)} changed subdirectories")
+
+    reuse = None
+    if changed is not None:
+        reuse = {}
+        for category, items in previous.get("categories", {}).items():
+            reuse[category] = {
+                subdir: templates for subdir, templates in items.items()
+                if subdir != "root" and (category, subdir) not in changed
+            }
+
+    print(f"Scanning {', '.join(CATEGORIES)}...")
+    with METRICS.phase("scan"):
+        index["categories"] = METRICS.profiled(scan_categories)(Path(mirror_dir), CATEGORIES, reuse)
+    with METRICS.phase("hash"):
+        hash_templates(Path(mirror_dir), index["categories"], checkout_blob_ids(mirror_dir))
+
+    if documents is not None:
+        carried = None
+        if reuse is not None and previous_path:
+            carried = carry_over_documents(
+                previous_path, previous, {(c, s) for c, items in reuse.items() for s in items}
+            )
+        print("Extracting template documents...")
+        with METRICS.phase("extract"):
+            if carried is None:
+                documents.extend(extract_documents(Path(mirror_dir), index["categories"]))
+            else:
+                documents.extend(extract_changed_documents(Path(mirror_dir), index["categories"],
+                                                           carried))
+
+    if store_dir:
+        _update_store_safely(store_dir, mirror_dir, commit)
+
+    return index
+
+
+def is_git_bundle(path: str) -> bool:
+    """True for a git bundle file (v2 or v3 header)"""
+    with open(path, "rb") as f:
+        return f.read(16) in (b"# v2 git bundle\n", b"# v3 git bundle\n")
+
+
+def read_tarball(archive_path: str, with_contents: bool = False, store_dir: str = None) -> tuple:
+    """Stream a .tar/.tar.gz and list the files under COMPONENTS_PATH
+
+    Nothing is extracted to disk. Returns (files, contents, commit): files are
+    (relpath, {"size": n}) pairs (plus the "hash" blob ID for files that can
+    be templates), contents holds candidate template files when
+    ``with_contents`` is set, and commit comes from the pax comment GitHub
+    writes into its tarballs (None otherwise). With ``store_dir`` every
+    component file is also written to the template store as it streams past.
+    """
+    files = []
+    contents = {}
+    commit = None
+    stored = {}
+
+    with tarfile.open(archive_path, "r|*") as tar:
+        for member in tar:
+            if commit is None and re.fullmatch(r"[0-9a-f]{40}", tar.pax_headers.get("comment", "")):
+                commit = tar.pax_headers["comment"]
+            # Symlinks and other special members cannot be resolved from a stream
+            if not member.isfile():
+                continue
+            relpath = _components_relpath(member.name)
+            if relpath is None:
+                continue
+            record = {"size": member.size}
+            files.append((relpath, record))
+            # Members can only be read as they stream past, so hash (and keep)
+            # every file that could turn out to be a template (at most
+            # category/sub/dir/file)
+            candidate = _template_suffix(relpath) and relpath.count("/") <= 3
+            in_store = store_dir and relpath.split("/", 1)[0] in CATEGORIES
+            if candidate or in_store:
+                data = tar.extractfile(member).read()
+                oid = git_blob_id(data)
+                if candidate:
+                    record["hash"] = oid
+                    if with_contents:
+                        contents[relpath] = data
+                if in_store:
+                    stored[relpath] = write_object(store_dir, data, oid)
+
+    if store_dir:
+        save_manifest(store_dir, stored, commit)
+        METRICS.add("store", files=len(stored))
+        print(f"Template store updated: {len(stored)} files")
+
+    return files, contents, commit
+
+
+def parse_ls_tree(output: str, long: bool = True) -> list:
+    """Blobs from ``git ls-tree -r -z [-l]`` output as (relpath, oid, size)
+
+    Paths are made relative to COMPONENTS_PATH. Symlinks and submodules are
+    skipped, size is None without ``-l``.
+    """
+    entries = []
+    prefix = COMPONENTS_PATH + "/"
+    for record in output.split("\0"):
+        if not record:
+            continue
+        info, path = record.split("\t", 1)
+        fields = info.split()
+        mode, obj_type, oid = fields[:3]
+        if obj_type != "blob" or mode == "120000" or not path.startswith(prefix):
+            continue
+        size = int(fields[3]) if long else None
+        entries.append((path[len(prefix):], oid, size))
+    return entries
+
+
+def tree_blob_ids(repo_dir: str, treeish: str = "HEAD") -> dict:
+    """{relpath: blob id} for every component file of a commit (one ``git ls-tree`` call)"""
+    entries = parse_ls_tree(
+        run_git(["ls-tree", "-r", "-z", treeish, "--", COMPONENTS_PATH], repo_dir), long=False
+    )
+    return {relpath: oid for relpath, oid, _ in entries}
+
+
+def checkout_blob_ids(repo_dir: str) -> dict:
+    """tree_blob_ids of a checkout's HEAD (empty when it is not a git repository)"""
+    try:
+        return tree_blob_ids(repo_dir)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return {}
+
+
+def _hash_file(path: Path) -> str:
+    """Blob ID of a file on disk (None if it cannot be read)"""
+    try:
+        return git_blob_id(path.read_bytes())
+    except OSError:
+        return None
+
+
+def hash_templates(base_path: Path, categories: dict, known: dict = None,
+                   workers: int = None):
+    """Set the "hash" field (git blob ID) of every template in place
+
+    IDs found in ``known`` (relpath -> blob id, as from tree_blob_ids) are
+    used as is. Other files, such as symlinks, uncommitted edits or checkouts
+    that are not git repositories, are read and hashed on a thread pool.
+    """
+    known = known or {}
+    unknown = []
+    for category, subcats in categories.items():
+        for subcat, templates in subcats.items():
+            for tmpl in templates:
+                oid = known.get(template_relpath(category, subcat, tmpl))
+                if oid is None:
+                    unknown.append((tmpl, template_file_path(base_path, category, subcat, tmpl)))
+                else:
+                    tmpl["hash"] = oid
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (tmpl, _), oid in zip(unknown, pool.map(_hash_file, (path for _, path in unknown))):
+            tmpl["hash"] = oid
+    METRICS.add("hash", hashed_files=len(unknown))
+
+
+def read_blobs(repo_dir: str, oids: list) -> dict:
+    """Contents of many blobs in one ``git cat-file --batch`` call (oid -> bytes)"""
+    if not oids:
+        return {}
+    result = subprocess.run(
+        ["git", "cat-file", "--batch"],
+        cwd=repo_dir,
+        input="".join(f"{oid}\n" for oid in oids).encode(),
+        check=True,
+        capture_output=True
+    )
+    blobs = {}
+    data = result.stdout
+    pos = 0
+    while pos < len(data):
+        end = data.index(b"\n", pos)
+        header = data[pos:end].decode().split()
+        pos = end + 1
+        if len(header) < 3 or header[1] == "missing":
+            continue
+        size = int(header[2])
+        blobs[header[0]] = data[pos:pos + size]
+        pos += size + 1
+    return blobs
+
+
+def read_blob_sizes(repo_dir: str, oids: list) -> dict:
+    """Sizes of many blobs in one ``git cat-file --batch-check`` call (oid -> size)"""
+    if not oids:
+        return {}
+    output = subprocess.run(
+        ["git", "cat-file", "--batch-check"],
+        cwd=repo_dir,
+        input="".join(f"{oid}\n" for oid in oids),
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    sizes = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 3:
+            sizes[fields[0]] = int(fields[2])
+    return sizes
+
+
+def fetch_blobs(repo_dir: str, oids: list):
+    """Fetch just these blobs into a partial clone (one round trip, like git's lazy fetch)"""
+    if not oids:
+        return
+    subprocess.run(
+        ["git", "-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "origin",
+         "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+         "--filter=blob:none", "--stdin"],
+        cwd=repo_dir,
+        input="".join(f"{oid}\n" for oid in oids),
+        check=True,
+        capture_output=True,
+        text=True
+    )
+
+
+def update_content_store(store_dir: str, repo_dir: str, commit: str = None,
+                         treeish: str = "HEAD", fetch_missing: bool = False):
+    """Copy every component file of a repository into the local template store
+
+    Objects are taken straight from git (no checkout needed), only blobs the
+    store does not have yet are read. ``fetch_missing`` fetches them first in
+    a partial clone.
+    """
+    files = {
+        relpath: oid for relpath, oid in tree_blob_ids(repo_dir, treeish).items()
+        if relpath.split("/", 1)[0] in CATEGORIES
+    }
+    missing = sorted({oid for oid in files.values() if not has_object(store_dir, oid)})
+    if fetch_missing:
+        fetch_blobs(repo_dir, missing)
+    for oid, data in read_blobs(repo_dir, missing).items():
+        write_object(store_dir, data, oid)
+    save_manifest(store_dir, files, commit)
+    METRICS.add("store", files=len(files), new_objects=len(missing))
+    print(f"Template store updated: {len(files)} files, {len(missing)} new objects")
+
+
+def _update_store_safely(store_dir: str, *args, **kwargs):
+    """update_content_store that only warns on failure (the index is still usable)"""
+    try:
+        with METRICS.phase("store"):
+            update_content_store(store_dir, *args, **kwargs)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Warning: template store not updated: {e}")
+
+
+def read_git_bundle(bundle_path: str, with_contents: bool = False,
+                    store_dir: str = None) -> tuple:
+    """List the files under COMPONENTS_PATH in a git bundle without a checkout
+
+    Objects are unpacked into a temporary bare repository, the listing comes
+    from the tree objects. Returns (files, contents, commit) like read_tarball,
+    contents only holds the files that end up as templates. With ``store_dir``
+    the component files are also copied into the template store.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="aitmpl_bundle_")
+    bundle = str(Path(bundle_path).resolve())
+
+    try:
+        run_git(["init", "--bare", "--quiet"], temp_dir)
+        listing = run_git(["bundle", "list-heads", bundle], temp_dir)
+        heads = [line.split()[1] for line in listing.splitlines() if len(line.split()) == 2]
+        if not heads:
+            raise ValueError("bundle has no refs")
+        ref = "HEAD" if "HEAD" in heads else heads[0]
+        run_git(["fetch", "--quiet", bundle, ref], temp_dir)
+        commit = run_git(["rev-parse", "FETCH_HEAD"], temp_dir)
+
+        entries = parse_ls_tree(
+            run_git(["ls-tree", "-r", "-z", "-l", commit, "--", COMPONENTS_PATH], temp_dir)
+        )
+        files = [(relpath, {"size": size, "hash": oid}) for relpath, oid, size in entries]
+
+        contents = {}
+        if with_contents:
+            oids = {relpath: oid for relpath, oid, _ in entries}
+            wanted = {
+                template_relpath(category, subcat, tmpl)
+                for category, subcats in build_categories_from_listing(files).items()
+                for subcat, templates in subcats.items()
+                for tmpl in templates
+            }
+            blobs = read_blobs(temp_dir, sorted({oids[path] for path in wanted}))
+            contents = {path: blobs.get(oids[path], b"") for path in wanted}
+
+        if store_dir:
+            _update_store_safely(store_dir, temp_dir, commit, treeish=commit)
+    finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
 
+    return files, contents, commit
+
+
+def build_index_from_source(source_path: str, documents: list = None,
+                            store_dir: str = None) -> dict:
+    """Build index from a local .tar/.tar.gz or git bundle (offline, no checkout)
+
+    Returns None if the source cannot be read.
+    """
+    index = {
+        "version": "1.0",
+        "updated_at": datetime.now().isoformat(),
+        "source": "https://github.com/davila7/claude-code-templates",
+        "method": "tarball",
+        "commit": None,
+        "categories": {}
+    }
+
+    try:
+        with METRICS.phase("read-source"):
+            if is_git_bundle(source_path):
+                index["method"] = "git-bundle"
+                print(f"Reading git bundle {source_path}...")
+                files, contents, commit = read_git_bundle(
+                    source_path, documents is not None, store_dir
+                )
+            else:
+                print(f"Streaming archive {source_path}...")
+                files, contents, commit = read_tarball(source_path, documents is not None,
+                                                       store_dir)
+        METRICS.add("read-source", bytes=os.path.getsize(source_path), entries=len(files))
+    except (OSError, ValueError, tarfile.TarError, subprocess.CalledProcessError) as e:
+        print(f"Failed to read source: {e}")
+        return None
+
+    index["commit"] = commit
+    print(f"Indexing {len(files)} files from {', '.join(CATEGORIES)}...")
+    with METRICS.phase("scan"):
+        index["categories"] = METRICS.profiled(build_categories_from_listing)(files, CATEGORIES)
+
+    if documents is not None:
+        print("Extracting template documents...")
+        with METRICS.phase("extract"):
+            documents.extend(extract_documents_from_contents(index["categories"], contents))
+
     return index
 
 
-def save_index(index: dict, output_path: str = None):
-    """Save index to file"""
+def load_sources(sources_path: str) -> list:
+    """Read a sources file: a JSON list of {"name", "url" or "path", "priority"}
+
+    ``name`` defaults to the last path component, ``priority`` to 0. Raises
+    ValueError on a malformed file.
+    """
+    with open(sources_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list) or not data:
+        raise ValueError("sources file must be a non-empty JSON list")
+
+    sources = []
+    for i, entry in enumerate(data):
+        if not isinstance(entry, dict) or bool(entry.get("url")) == bool(entry.get("path")):
+            raise ValueError(f"source #{i + 1} needs exactly one of 'url' or 'path'")
+        location = entry.get("url") or entry.get("path")
+        name = entry.get("name") or location.rstrip("/").rsplit("/", 1)[-1].removesuffix(".git")
+        priority = entry.get("priority", 0)
+        if not isinstance(priority, (int, float)):
+            raise ValueError(f"source {name!r}: priority must be a number")
+        sources.append({"name": name, **{k: entry[k] for k in ("url", "path") if entry.get(k)},
+                        "priority": priority})
+
+    names = [source["name"] for source in sources]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate source names: {', '.join(duplicates)}")
+    return sources
+
+
+async def run_git_async(args: list, cwd: str = None) -> str:
+    """run_git as an asyncio subprocess (other sources keep running meanwhile)
+
+    Cancelling it kills git and waits for it to exit.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args, cwd=cwd,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode:
+        raise subprocess.CalledProcessError(
+            proc.returncode, ["git", *args], stdout.decode(), stderr.decode()
+        )
+    return stdout.decode().strip()
+
+
+async def _in_thread(func, *args):
+    """asyncio.to_thread that, when cancelled, still waits for the thread to finish
+
+    Threads cannot be interrupted, and the caller may delete the files they use.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+def store_checkout_files(store_dir: str, base_path: Path) -> dict:
+    """Copy the component files of a checkout into the store objects
+
+    Returns {relpath: blob id} for the manifest; works for plain directories
+    that are not git repositories.
+    """
+    components = Path(base_path) / COMPONENTS_PATH
+    files = {}
+    for category in CATEGORIES:
+        for root, dirs, names in os.walk(components / category):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in names:
+                path = Path(root) / name
+                if path.is_symlink() or not path.is_file():
+                    continue
+                files[path.relative_to(components).as_posix()] = write_object(
+                    store_dir, path.read_bytes()
+                )
+    return files
+
+
+async def fetch_and_scan_source(source: dict, clone_dir: str, with_documents: bool = False,
+                                store_dir: str = None) -> dict:
+    """Clone (URL, into ``clone_dir``) or open (local path) one source and scan it
+
+    Returns {"categories", "documents", "files", "commit"}; ``files`` is the
+    store listing and is only filled with ``store_dir``.
+    """
+    name = source["name"]
+    start = time.perf_counter()
+    if source.get("path"):
+        base = Path(source["path"])
+        if not (base / COMPONENTS_PATH).is_dir():
+            raise ValueError(f"{base} has no {COMPONENTS_PATH} directory")
+        try:
+            commit = await run_git_async(["rev-parse", "HEAD"], str(base))
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            commit = None
+    else:
+        base = Path(clone_dir)
+        print(f"[{name}] Cloning {source['url']} (shallow)...")
+        await run_git_async(["clone", "--depth", "1", "--quiet", source["url"], str(base)])
+        commit = await run_git_async(["rev-parse", "HEAD"], str(base))
+        METRICS.add(f"source:{name}", bytes=dir_size(base / ".git"))
+
+    categories = await _in_thread(METRICS.profiled(scan_categories), base, CATEGORIES)
+    # A local checkout may have uncommitted edits, so its files are hashed from disk
+    known = {} if source.get("path") else await _in_thread(checkout_blob_ids, str(base))
+    await _in_thread(hash_templates, base, categories, known)
+    documents = None
+    if with_documents:
+        documents = await _in_thread(extract_documents, base, categories)
+    files = {}
+    if store_dir:
+        files = await _in_thread(store_checkout_files, store_dir, base)
+
+    count = sum(len(t) for subcats in categories.values() for t in subcats.values())
+    METRICS.add(f"source:{name}", seconds=time.perf_counter() - start, templates=count)
+    print(f"[{name}] {count} templates")
+    return {"categories": categories, "documents": documents, "files": files, "commit": commit}
+
+
+def merge_source_categories(sources: list, results: list) -> tuple:
+    """Merge the scanned categories of several sources into one
+
+    Every template gets a "source" field. When several sources provide the
+    same category/subcategory/name the highest priority wins, ties go to the
+    source listed first. Subcategories are sorted by name, templates keep the
+    winning source's order. Returns (categories, conflicts).
+    """
+    order = sorted(range(len(sources)), key=lambda i: (-sources[i]["priority"], i))
+    merged = {category: {} for category in CATEGORIES}
+    conflicts = 0
+    for i in order:
+        for category, subcats in results[i]["categories"].items():
+            for subcat, templates in subcats.items():
+                bucket = merged[category].setdefault(subcat, {})
+                for tmpl in templates:
+                    if tmpl["name"] in bucket:
+                        conflicts += 1
+                        continue
+                    bucket[tmpl["name"]] = {**tmpl, "source": sources[i]["name"]}
+
+    categories = {
+        category: {subcat: list(subcats[subcat].values()) for subcat in sorted(subcats)}
+        for category, subcats in merged.items()
+    }
+    return categories, conflicts
+
+
+async def _gather_sources(sources: list, with_documents: bool, store_dir: str) -> list:
+    temp_root = tempfile.mkdtemp(prefix="aitmpl_sources_")
+    tasks = [
+        asyncio.create_task(fetch_and_scan_source(
+            source, os.path.join(temp_root, str(i)), with_documents, store_dir
+        ))
+        for i, source in enumerate(sources)
+    ]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # Stop the other sources (killing their clones, letting scans finish)
+        # before their directories are removed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        shutil.rmtree(temp_root, ignore_errors=True)
+
+
+def build_index_from_sources(sources: list, documents: list = None,
+                             store_dir: str = None) -> dict:
+    """Build one index from several repositories/checkouts fetched concurrently
+
+    Clones run as asyncio subprocesses and scans on worker threads, so the
+    total time is close to the slowest source. Returns None if any source
+    fails (a partial index would look like mass template removal). The
+    template store holds the files of every source, the highest priority
+    source wins for identical paths.
+    """
+    index = {
+        "version": "1.0",
+        "updated_at": datetime.now().isoformat(),
+        "source": "https://github.com/davila7/claude-code-templates",
+        "method": "multi-source",
+        "commit": None,
+        "sources": [],
+        "categories": {}
+    }
+
+    print(f"Syncing {len(sources)} sources concurrently...")
+    try:
+        with METRICS.phase("sources"):
+            results = asyncio.run(_gather_sources(sources, documents is not None, store_dir))
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", None)
+        print(f"Failed to sync sources: {e}" + (f"\nstderr: {stderr}" if stderr else ""))
+        return None
+
+    index["sources"] = [
+        {**source, "commit": result["commit"]} for source, result in zip(sources, results)
+    ]
+    with METRICS.phase("merge"):
+        index["categories"], conflicts = merge_source_categories(sources, results)
+    print(f"Merged {len(sources)} sources ({conflicts} conflicts resolved by priority)")
+
+    if documents is not None:
+        winners = {
+            (category, subcat, tmpl["name"]): tmpl["source"]
+            for category, subcats in index["categories"].items()
+            for subcat, templates in subcats.items()
+            for tmpl in templates
+        }
+        documents.extend(
+            doc
+            for source, result in zip(sources, results)
+            for doc in result["documents"]
+            if winners.get((doc["category"], doc["subcategory"], doc["name"])) == source["name"]
+        )
+
+    if store_dir:
+        files = {}
+        for i in sorted(range(len(sources)), key=lambda i: (-sources[i]["priority"], i)):
+            for relpath, oid in results[i]["files"].items():
+                files.setdefault(relpath, oid)
+        try:
+            with METRICS.phase("store"):
+                save_manifest(store_dir, files)
+            print(f"Template store updated: {len(files)} files")
+        except OSError as e:
+            print(f"Warning: template store not updated: {e}")
+
+    return index
+
+
+def load_previous_index(index_path: str, sqlite_first: bool = False) -> dict:
+    """Previously saved index, JSON or SQLite store (empty dict if missing or unreadable)"""
+    paths = [Path(index_path), sqlite_store_path(index_path)]
+    if sqlite_first:
+        paths.reverse()
+    for path in paths:
+        if not path.exists():
+            continue
+        try:
+            return load_index(str(path))
+        except (OSError, ValueError, sqlite3.Error):
+            continue
+    return {}
+
+
+def sqlite_store_path(output_path: str) -> Path:
+    """SQLite store written next to the JSON index"""
+    return Path(output_path).with_suffix(".db")
+
+
+def sidecar_version(path) -> str:
+    """index_version a sidecar was built for, read from its first bytes (None if missing)"""
+    try:
+        with open(path, "rb") as f:
+            match = SIDECAR_VERSION_RE.search(f.read(4096))
+    except OSError:
+        return None
+    return json.loads(match.group(1)) if match else None
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """Write JSON through a temp file and rename it over the target"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+
+def _template_records(index: dict) -> dict:
+    """{"category/subcat/name": template} for every template in an index"""
+    return {
+        f"{category}/{subcat}/{tmpl['name']}": tmpl
+        for category, subcats in index.get("categories", {}).items()
+        for subcat, templates in subcats.items()
+        for tmpl in templates
+    }
+
+
+def diff_indexes(old: dict, new: dict) -> dict:
+    """Templates added, removed, resized or modified between two indexes
+
+    "modified" lists content changes by blob ID, including edits that keep
+    the size; it is empty when either index predates template hashes.
+    """
+    old_records = _template_records(old)
+    new_records = _template_records(new)
+    resized = []
+    modified = []
+    for path, tmpl in new_records.items():
+        previous = old_records.get(path)
+        if previous is None:
+            continue
+        if previous.get("size") != tmpl.get("size"):
+            resized.append({"path": path, "old_size": previous.get("size"),
+                            "new_size": tmpl.get("size")})
+        old_hash, new_hash = previous.get("hash"), tmpl.get("hash")
+        if old_hash and new_hash and old_hash != new_hash:
+            modified.append({"path": path, "old_hash": old_hash, "new_hash": new_hash})
+    return {
+        "added": [path for path in new_records if path not in old_records],
+        "removed": [path for path in old_records if path not in new_records],
+        "resized": resized,
+        "modified": modified,
+    }
+
+
+def save_index(index: dict, output_path: str = None, store: str = "json",
+               documents: list = None, changes: dict = None, sidecars: dict = None) -> dict:
+    """Save index to file (JSON, SQLite store next to it, or both)
+
+    A target is left alone when the index equals the stored one apart from
+    ``updated_at`` and the target already holds that version; otherwise files
+    are replaced atomically. ``documents`` from the build step are turned
+    into the BM25 full-text sidecar and contribute frontmatter tags to the
+    tag table.
+
+    Callers that keep the index in memory (watch mode) pass ``changes``, the
+    diff against the index they saved last, which skips reading it back, and
+    may pass prebuilt ``sidecars`` ({"ngram", "fulltext", "tags"}).
+
+    Returns a change report (added/removed/resized/modified templates, written or not).
+    """
     if output_path is None:
         output_path = OUTPUT_FILE
 
@@ -139,31 +1593,194 @@ def save_index(index: dict, output_path: str = None):
         summary[cat] = {"categories": len(items), "templates": total}
     index["summary"] = summary
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(index, f, indent=2, ensure_ascii=False)
+    if changes is not None:
+        previous, unchanged = {"commit": index.get("commit")}, False
+    else:
+        with METRICS.phase("compare"):
+            # Compare with the store being written, the other one may be older
+            previous = load_previous_index(output_path, sqlite_first=store == "sqlite")
+            changes = diff_indexes(previous, index)
+            unchanged = bool(previous) and (
+                {k: v for k, v in previous.items() if k != "updated_at"}
+                == {k: v for k, v in index.items() if k != "updated_at"}
+            )
+    sidecars = sidecars or {}
+    if unchanged:
+        # Keep the old timestamp so existing sidecars stay valid
+        index["updated_at"] = previous.get("updated_at")
+        print(f"\nIndex unchanged, keeping {output_path}")
+
+    report = {
+        "changed": any(changes.values()),
+        "written": False,
+        "commit": {"old": previous.get("commit"), "new": index.get("commit")},
+        "updated_at": index.get("updated_at"),
+        **changes,
+    }
+
+    def needs_write(path, version_of) -> bool:
+        # Every target records the index version it holds, so a store that
+        # was skipped or written by an older run is refreshed even when the
+        # index itself did not change
+        if unchanged and version_of(path) == index["updated_at"]:
+            return False
+        report["written"] = True
+        return True
+
+    if store in ("json", "both"):
+        if needs_write(output_file, index_updated_at):
+            with METRICS.phase("write-json"):
+                write_json_atomic(output_file, index, indent=2)
+            METRICS.add("write-json", bytes=output_file.stat().st_size)
+            print(f"\nIndex saved to {output_path}")
+
+        # Trigram posting lists for keyword search
+        ngram_path = sidecar_path(output_path, "ngram")
+        if needs_write(ngram_path, sidecar_version):
+            with METRICS.phase("write-ngram"):
+                ngram = sidecars.get("ngram") or build_ngram_index(index)
+                write_json_atomic(ngram_path, ngram, separators=(",", ":"))
+            METRICS.add("write-ngram", bytes=ngram_path.stat().st_size)
+
+    if store in ("sqlite", "both"):
+        db_path = sqlite_store_path(output_path)
+        if needs_write(db_path, index_updated_at):
+            with METRICS.phase("write-sqlite"):
+                write_sqlite_store(index, db_path)
+            METRICS.add("write-sqlite", bytes=db_path.stat().st_size)
+            print(f"\nIndex store saved to {db_path}")
+
+    # Document-derived sidecars follow template contents, which can change
+    # without changing the index, so they are refreshed whenever available
+    if documents or "fulltext" in sidecars:
+        fulltext_path = sidecar_path(output_path, "fulltext")
+        with METRICS.phase("write-fulltext"):
+            fulltext = sidecars.get("fulltext") or build_fulltext_index(index, documents)
+            write_json_atomic(fulltext_path, fulltext, separators=(",", ":"))
+        METRICS.add("write-fulltext", bytes=fulltext_path.stat().st_size)
+
+    # Flattened tag closures plus tags derived from names and frontmatter
+    tags_path = sidecar_path(output_path, "tags")
+    if documents or "tags" in sidecars or needs_write(tags_path, sidecar_version):
+        with METRICS.phase("write-tags"):
+            tags = sidecars.get("tags") or build_tag_table(index, documents)
+            write_json_atomic(tags_path, tags, separators=(",", ":"))
+        METRICS.add("write-tags", bytes=tags_path.stat().st_size)
+
+    # Cached search output may no longer match the files just written
+    if report["written"] or documents or sidecars:
+        invalidate_cache(output_path)
 
-    print(f"\nIndex saved to {output_path}")
     print(f"Total categories: {len(index['categories'])}")
 
     for cat, data in summary.items():
         print(f"  - {cat}: {data['categories']} subcategories, {data['templates']} templates")
 
+    if report["changed"]:
+        print(f"Changes: {len(changes['added'])} added, {len(changes['removed'])} removed, "
+              f"{len(changes['resized'])} resized, {len(changes['modified'])} modified")
 
-def main():
-    import argparse
+    return report
 
-    parser = argparse.ArgumentParser(description="Sync AITMPL template index (via git clone)")
+
+def write_metrics(path: str, index: dict, profile_path: str = None):
+    """Write the collected sync metrics as JSON (and the scan profile if requested)"""
+    if profile_path:
+        METRICS.dump_profile(profile_path)
+    write_json_atomic(path, {
+        "method": index.get("method"),
+        "commit": index.get("commit"),
+        "templates": sum(
+            len(templates) for subcats in index.get("categories", {}).values()
+            for templates in subcats.values()
+        ),
+        **METRICS.to_dict(),
+        "profile": profile_path,
+    }, indent=2)
+
+
+def add_sync_arguments(parser):
+    """Add the sync options (shared with the `aitmpl_manager.py sync` subcommand)"""
     parser.add_argument("-o", "--output", default=OUTPUT_FILE, help="Output file path")
     parser.add_argument("--dry-run", action="store_true", help="Print without saving")
+    parser.add_argument("--mirror", nargs="?", const=MIRROR_DIR, metavar="DIR",
+                        help=f"Keep a cached clone and rescan only changed subdirs (default: {MIRROR_DIR})")
+    parser.add_argument("--blobless", action="store_true",
+                        help="Index from tree objects of a blobless clone (no checkout)")
+    parser.add_argument("--source", metavar="PATH",
+                        help="Index a local .tar/.tar.gz or git bundle instead of cloning (offline)")
+    parser.add_argument("--sources", metavar="FILE",
+                        help="Merge several repos/checkouts: JSON list of {name, url|path, priority}")
+    parser.add_argument("--watch", metavar="PATH",
+                        help="Index a local checkout and keep the index updated as files change")
+    parser.add_argument("--poll", action="store_true",
+                        help="With --watch: poll sizes/mtimes instead of using inotify")
+    parser.add_argument("--report", metavar="FILE",
+                        help="Write a JSON report of added/removed/resized/modified templates")
+    parser.add_argument("--store", choices=STORES, default="json",
+                        help="Index backend: JSON file, SQLite/FTS5 store (.db next to output) or both")
+    parser.add_argument("--content-store", default=STORE_DIR, metavar="DIR",
+                        help=f"Template store used for offline installs (default: {STORE_DIR})")
+    parser.add_argument("--no-content-store", action="store_true",
+                        help="Do not update the template store")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Write per-phase/per-category timings and counters as JSON")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="Write a cProfile dump of the scan (use with --metrics or alone)")
 
-    args = parser.parse_args()
 
-    index = build_index_from_clone()
+def run_sync(args):
+    """Run a sync for parsed add_sync_arguments() options (exits 1 on failure)"""
+    if args.watch:
+        from watch_aitmpl import watch
+        watch(args.watch, args.output, args.store, args.poll)
+        return
+
+    if args.profile:
+        METRICS.start_profiling()
+
+    documents = []
+    store_dir = None if args.no_content_store or args.dry_run else args.content_store
+    if args.sources:
+        try:
+            sources = load_sources(args.sources)
+        except (OSError, ValueError) as e:
+            print(f"Error: invalid sources file: {e}")
+            sys.exit(1)
+        index = build_index_from_sources(sources, documents, store_dir)
+    elif args.source:
+        index = build_index_from_source(args.source, documents, store_dir)
+    elif args.mirror:
+        index = build_index_from_mirror(args.mirror, load_previous_index(args.output),
+                                        documents=documents, store_dir=store_dir,
+                                        previous_path=args.output)
+    elif args.blobless:
+        index = build_index_from_tree(documents=documents, store_dir=store_dir)
+    else:
+        index = build_index_from_clone(documents=documents, store_dir=store_dir)
+    # Keep the previous index rather than replacing it with an empty one
+    if index is None:
+        sys.exit(1)
 
     if args.dry_run:
         print(json.dumps(index, indent=2, ensure_ascii=False))
     else:
-        save_index(index, args.output)
+        report = save_index(index, args.output, args.store, documents)
+        if args.report:
+            write_json_atomic(args.report, report, indent=2)
+
+    if args.metrics:
+        write_metrics(args.metrics, index, args.profile)
+    elif args.profile:
+        METRICS.dump_profile(args.profile)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync AITMPL template index (via git clone)")
+    add_sync_arguments(parser)
+    run_sync(parser.parse_args())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+AITMPL 로컬 템플릿 저장소 + 네이티브 설치
+sync 때 컴포넌트 파일을 git blob id 로 저장해 두고, npx 없이 .claude/ 로 바로 설치
+
+저장소 구조:
+  .claude/aitmpl-store/objects/ab/cdef...   파일 내용 (git blob id 기준, 중복 없음)
+  .claude/aitmpl-store/manifest.json        {"commit", "updated_at", "files": {경로: blob id}}
+경로는 cli-tool/components 기준 (예: agents/security/security-auditor.md)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+STORE_DIR = ".claude/aitmpl-store"
+MANIFEST_FILE = "manifest.json"
+
+# 카테고리별 설치 위치 (.claude/ 기준)
+FILE_CATEGORIES = ("agents", "commands")
+SETTINGS_FILE = ".claude/settings.json"
+MCP_FILE = ".mcp.json"
+
+
+def git_blob_id(data: bytes) -> str:
+    """git hash-object 와 같은 blob id"""
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
+def object_path(store_dir: str, oid: str) -> Path:
+    """blob id 에 해당하는 객체 파일 경로"""
+    return Path(store_dir or STORE_DIR) / "objects" / oid[:2] / oid[2:]
+
+
+def has_object(store_dir: str, oid: str) -> bool:
+    return object_path(store_dir, oid).exists()
+
+
+def write_object(store_dir: str, data: bytes, oid: str = None) -> str:
+    """객체 저장 (이미 있으면 건너뜀), blob id 반환"""
+    oid = oid or git_blob_id(data)
+    path = object_path(store_dir, oid)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    return oid
+
+
+def read_object(store_dir: str, oid: str) -> bytes:
+    return object_path(store_dir, oid).read_bytes()
+
+
+def load_manifest(store_dir: str = None) -> dict:
+    """저장소 목록 로드 (저장소가 없으면 None)"""
+    path = Path(store_dir or STORE_DIR) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_manifest(store_dir: str, files: dict, commit: str = None):
+    """목록 저장 후 더 이상 참조되지 않는 객체 삭제"""
+    root = Path(store_dir or STORE_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "version": "1.0",
+        "commit": commit,
+        "updated_at": datetime.now().isoformat(),
+        "files": dict(sorted(files.items())),
+    }
+    tmp_path = root / f".{MANIFEST_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, root / MANIFEST_FILE)
+
+    referenced = set(files.values())
+    objects = root / "objects"
+    if objects.exists():
+        for bucket in objects.iterdir():
+            for obj in bucket.iterdir():
+                if bucket.name + obj.name not in referenced:
+                    obj.unlink()
+
+
+def template_files(manifest: dict, category: str, item: str) -> dict:
+    """템플릿을 이루는 파일 {템플릿 기준 상대 경로: blob id} (저장소에 없으면 빈 dict)
+
+    agents/commands/hooks 등은 파일 하나, SKILL.md 가 있는 스킬은 폴더 전체
+    """
+    files = manifest.get("files", {})
+    base = f"{category}/{item}"
+    name = item.rsplit("/", 1)[-1]
+    for suffix in (".md", ".json"):
+        if base + suffix in files:
+            return {name + suffix: files[base + suffix]}
+
+    prefix = base + "/"
+    if prefix + "SKILL.md" in files:
+        return {
+            path[len(prefix):]: oid for path, oid in files.items() if path.startswith(prefix)
+        }
+    return {}
+
+
+def native_files(manifest: dict, category: str, item: str) -> dict:
+    """네이티브로 설치할 수 있는 템플릿이면 그 파일들, 아니면 빈 dict (-> npx)"""
+    files = template_files(manifest, category, item)
+    name = item.rsplit("/", 1)[-1]
+    if category in FILE_CATEGORIES:
+        supported = list(files) == [f"{name}.md"]
+    elif category == "skills":
+        supported = "SKILL.md" in files
+    elif category in ("hooks", "settings", "mcps"):
+        supported = list(files) == [f"{name}.json"]
+    else:
+        supported = False
+    return files if supported else {}
+
+
+def installed_candidates(category: str, item: str, project_dir: str = ".") -> list:
+    """템플릿 본문 파일이 설치될 수 있는 경로들 (settings.json 등에 병합되는 카테고리는 빈 목록)
+
+    네이티브 설치처럼 마지막 이름만 쓰는 배치가 먼저, 이어서 npx 가 중첩 항목에 쓰는
+    item 경로를 점점 더 살린 배치 (skills/dev/nested/alpha -> alpha, nested/alpha, dev/nested/alpha)
+    """
+    if category not in FILE_CATEGORIES and category != "skills":
+        return []
+    base = Path(project_dir) / ".claude" / category
+    parts = item.split("/")
+    candidates = []
+    for start in range(len(parts) - 1, -1, -1):
+        if category == "skills":
+            candidates.append(base.joinpath(*parts[start:], "SKILL.md"))
+        else:
+            candidates.append(base.joinpath(*parts[start:-1], f"{parts[-1]}.md"))
+    return candidates
+
+
+def installed_file(category: str, item: str, project_dir: str = ".") -> Path:
+    """네이티브 설치가 쓰는 템플릿 본문 파일 경로 (settings.json 등에 병합되는 카테고리는 None)"""
+    candidates = installed_candidates(category, item, project_dir)
+    return candidates[0] if candidates else None
+
+
+def locate_installed(category: str, item: str, project_dir: str = ".") -> Path:
+    """실제로 설치된 본문 파일 (후보 중 처음 존재하는 것, 없으면 None)"""
+    for path in installed_candidates(category, item, project_dir):
+        if path.is_file():
+            return path
+    return None
+
+
+def merge_settings(target: dict, source: dict) -> dict:
+    """설정 병합 (dict 는 재귀, list 는 없는 항목만 추가, 나머지는 덮어씀)"""
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_settings(target[key], value)
+        elif isinstance(value, list) and isinstance(target.get(key), list):
+            target[key].extend(v for v in value if v not in target[key])
+        else:
+            target[key] = value
+    return target
+
+
+def _update_json_file(path: Path, update: dict):
+    """JSON 설정 파일에 병합 (임시 파일 + rename)"""
+    data = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    merge_settings(data, update)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def install_native(category: str, item: str, manifest: dict, store_dir: str = None,
+                   project_dir: str = ".") -> bool:
+    """저장소에서 템플릿 하나를 바로 설치 (처리할 수 없으면 False -> npx 사용)"""
+    files = native_files(manifest, category, item)
+    if not files:
+        return False
+    project = Path(project_dir)
+    name = item.rsplit("/", 1)[-1]
+
+    try:
+        if category in FILE_CATEGORIES:
+            target = installed_file(category, item, project_dir)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(read_object(store_dir, files[f"{name}.md"]))
+        elif category == "skills":
+            for relpath, oid in files.items():
+                target = project / ".claude" / "skills" / name / relpath
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(read_object(store_dir, oid))
+        else:
+            data = json.loads(read_object(store_dir, files[f"{name}.json"]))
+            if category == "hooks":
+                _update_json_file(project / SETTINGS_FILE, {"hooks": data.get("hooks", {})})
+            elif category == "settings":
+                data.pop("description", None)
+                _update_json_file(project / SETTINGS_FILE, data)
+            else:
+                _update_json_file(project / MCP_FILE, {"mcpServers": data.get("mcpServers", {})})
+    except (OSError, ValueError, AttributeError):
+        return False
+
+    return True
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+AITMPL 로컬 템플릿 감시 (sync --watch)
+로컬 체크아웃의 components 트리를 감시하고 바뀐 category/서브디렉토리만 다시 스캔해 인덱스 갱신
+Linux 에서는 inotify (ctypes), 그 외에는 파일 크기/mtime 폴링
+"""
+
+import ctypes
+import ctypes.util
+import io
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+from search_aitmpl import (
+    assemble_fulltext_index, assemble_ngram_index, assemble_tag_table, document_tags,
+    document_terms, ngram_group, template_tags
+)
+from sync_aitmpl_index import (
+    CATEGORIES, COMPONENTS_PATH, OUTPUT_FILE, _template_suffix, diff_indexes, extract_documents,
+    hash_templates, head_commit, save_index, scan_categories, scan_subdir_fast
+)
+
+# 이벤트가 멈춘 뒤 기다리는 시간, 이벤트가 계속 와도 이 시간 안에는 반영
+DEBOUNCE_SECONDS = 0.2
+MAX_DELAY_SECONDS = 0.8
+POLL_INTERVAL = 0.5
+WHOLE_CATEGORY = "*"
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def checkout_root(path: str) -> Path:
+    """체크아웃 루트 (체크아웃이나 그 cli-tool/components 디렉토리, 둘 다 아니면 None)"""
+    path = Path(path).resolve()
+    if (path / COMPONENTS_PATH).is_dir():
+        return path
+    depth = len(Path(COMPONENTS_PATH).parts)
+    if path.is_dir() and path.parts[-depth:] == Path(COMPONENTS_PATH).parts:
+        return path.parents[depth - 1]
+    return None
+
+
+def affected_key(relpath: str, is_dir: bool) -> tuple:
+    """components 아래 이벤트가 건드린 (category, subdir)
+
+    category 바로 아래 파일은 "root" subdir, category 디렉토리 자체의 이벤트는
+    category 전체를 뜻함. 관계없는 파일이면 None
+    """
+    parts = relpath.split("/")
+    if parts[0] not in CATEGORIES:
+        return None
+    if len(parts) == 1:
+        return parts[0], WHOLE_CATEGORY
+    if len(parts) == 2 and not is_dir:
+        return (parts[0], "root") if _template_suffix(parts[1]) else None
+    if not is_dir and not _template_suffix(parts[-1]):
+        return None  # 편집기 swap/백업 파일
+    return parts[0], parts[1]
+
+
+class InotifyWatcher:
+    """components 트리 전체의 inotify 감시 (Linux 전용)"""
+
+    def __init__(self, components: Path, libc):
+        self.components = components
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # watch descriptor -> components 기준 상대 경로 (루트는 "")
+        self.add_tree(components)
+
+    @classmethod
+    def create(cls, components: Path):
+        """감시자 생성 (다른 OS, watch 한도 초과 등으로 inotify 를 못 쓰면 None)"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1
+        except (OSError, AttributeError):
+            return None
+        try:
+            return cls(components, libc)
+        except OSError as e:
+            print(f"Warning: inotify unavailable ({e})")
+            return None
+
+    def add_tree(self, path: Path):
+        """디렉토리와 그 아래 모든 디렉토리 감시 추가"""
+        for root, dirs, _ in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {root}")
+            relpath = Path(root).relative_to(self.components).as_posix()
+            self.paths[wd] = "" if relpath == "." else relpath
+
+    def changes(self, timeout: float = None) -> set:
+        """최대 timeout 초(None 이면 무한) 기다려 바뀐 (category, subdir) 집합 반환"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return set()
+
+        keys = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                keys.update((category, WHOLE_CATEGORY) for category in CATEGORIES)
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            parent = self.paths.get(wd)
+            if parent is None:
+                continue
+            relpath = f"{parent}/{name}".strip("/") if name else parent
+            is_dir = bool(mask & IN_ISDIR) or not name  # 감시 중인 디렉토리 자체의 이벤트
+            if is_dir and mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith("."):
+                try:
+                    self.add_tree(self.components / relpath)
+                except OSError:
+                    pass  # 그새 다시 삭제됨
+            if relpath:
+                key = affected_key(relpath, is_dir)
+                if key:
+                    keys.add(key)
+        return keys
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """inotify 대체: POLL_INTERVAL 마다 파일 크기/mtime 비교"""
+
+    def __init__(self, components: Path, interval: float = POLL_INTERVAL):
+        self.components = components
+        self.interval = interval
+        self.state = self.snapshot()
+
+    def snapshot(self) -> dict:
+        """{(category, subdir): (경로, 크기, mtime_ns) frozenset}"""
+        state = {}
+        for category in CATEGORIES:
+            category_path = self.components / category
+            try:
+                entries = list(os.scandir(category_path))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        files = []
+                        for root, dirs, names in os.walk(entry.path):
+                            for name in names:
+                                stat = os.stat(os.path.join(root, name))
+                                files.append((os.path.join(root, name), stat.st_size,
+                                              stat.st_mtime_ns))
+                        state[(category, entry.name)] = frozenset(files)
+                    elif _template_suffix(entry.name):
+                        stat = entry.stat()
+                        key = (category, "root")
+                        state[key] = state.get(key, frozenset()) | {
+                            (entry.name, stat.st_size, stat.st_mtime_ns)
+                        }
+                except OSError:
+                    continue  # 폴링 중 삭제됨, 다음 회차에 반영
+        return state
+
+    def changes(self, timeout: float = None) -> set:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        state = self.snapshot()
+        keys = {key for key in state.keys() | self.state.keys() if state.get(key) != self.state.get(key)}
+        self.state = state
+        return keys
+
+    def close(self):
+        pass
+
+
+def scan_root_templates(category_path: Path) -> list:
+    """category 디렉토리 바로 아래 템플릿 파일 ("root" subdir)"""
+    templates = []
+    try:
+        with os.scandir(category_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            suffix = _template_suffix(entry.name)
+            if entry.is_file() and suffix:
+                templates.append({
+                    "name": entry.name[:-len(suffix)],
+                    "file": entry.name,
+                    "size": entry.stat().st_size
+                })
+    except OSError:
+        pass
+    return templates
+
+
+def _subdir_order(item) -> str:
+    """scan_categories 와 같은 순서의 정렬 키 ("root" 는 첫 파일 위치)"""
+    subdir, templates = item
+    return templates[0]["file"] if subdir == "root" else subdir
+
+
+def apply_changes(index: dict, base: Path, keys: set, documents: dict = None):
+    """주어진 (category, subdir) 만 다시 스캔해 인덱스를 제자리에서 갱신
+
+    documents ((category, subdir) -> 추출 문서) 가 있으면 함께 갱신
+    """
+    for category, subdir in sorted(keys):
+        category_path = base / COMPONENTS_PATH / category
+        if subdir == WHOLE_CATEGORY:
+            items = scan_categories(base, [category])[category]
+            hash_templates(base, {category: items})
+            if documents is not None:
+                for key in [key for key in documents if key[0] == category]:
+                    del documents[key]
+                documents.update(group_documents(extract_documents(base, {category: items})))
+            index["categories"][category] = items
+            continue
+
+        if subdir == "root":
+            templates = scan_root_templates(category_path)
+        else:
+            try:
+                templates = scan_subdir_fast(str(category_path / subdir))
+            except OSError:
+                templates = []  # subdir 삭제됨
+        hash_templates(base, {category: {subdir: templates}})
+
+        items = index["categories"].setdefault(category, {})
+        if templates:
+            items[subdir] = templates
+        else:
+            items.pop(subdir, None)
+        index["categories"][category] = dict(sorted(items.items(), key=_subdir_order))
+
+        if documents is not None:
+            documents.pop((category, subdir), None)
+            if templates:
+                documents[(category, subdir)] = extract_documents(
+                    base, {category: {subdir: templates}}
+                )
+
+
+def group_documents(documents: list) -> dict:
+    """추출한 문서를 (category, subdir) 별로 묶음"""
+    groups = {}
+    for doc in documents:
+        groups.setdefault((doc["category"], doc["subcategory"]), []).append(doc)
+    return groups
+
+
+def _flat_documents(index: dict, documents: dict) -> list:
+    """인덱스 순서의 문서 목록 (전체 sync 가 추출하는 순서)"""
+    return [
+        doc
+        for category, subcats in index["categories"].items()
+        for subdir in subcats
+        for doc in documents.get((category, subdir), [])
+    ]
+
+
+def expand_keys(index: dict, keys: set) -> set:
+    """WHOLE_CATEGORY 를 인덱스에 있는 그 category 의 subdir 들로 펼침"""
+    expanded = set()
+    for category, subdir in keys:
+        if subdir == WHOLE_CATEGORY:
+            expanded.update((category, name) for name in index["categories"].get(category, {}))
+        else:
+            expanded.add((category, subdir))
+    return expanded
+
+
+def snapshot_groups(index: dict, keys: set) -> dict:
+    """주어진 (category, subdir) 의 템플릿 목록 (없는 subdir 는 None)"""
+    return {key: index["categories"].get(key[0], {}).get(key[1]) for key in keys}
+
+
+def _group_index(groups: dict) -> dict:
+    """snapshot_groups 결과를 diff_indexes 가 받는 인덱스 형태로"""
+    categories = {}
+    for (category, subdir), templates in groups.items():
+        if templates:
+            categories.setdefault(category, {})[subdir] = templates
+    return {"categories": categories}
+
+
+class SidecarParts:
+    """(category, subdir) 별 ngram/태그/BM25 조각을 메모리에 유지
+
+    바뀐 subdir 의 조각만 다시 계산하고, 사이드카는 인덱스 순서로 조각을 이어 붙여 만듦
+    """
+
+    def __init__(self):
+        self.parts = {}  # (category, subdir) -> (ngram 조각, 태그 조각, 문서별 term)
+
+    def update(self, index: dict, documents: dict, keys: set):
+        """주어진 (category, subdir) 조각을 다시 계산 (인덱스에서 빠졌으면 삭제)"""
+        for category, subdir in keys:
+            templates = index["categories"].get(category, {}).get(subdir)
+            if not templates:
+                self.parts.pop((category, subdir), None)
+                continue
+            docs = documents.get((category, subdir), [])
+            tags = template_tags(category, subdir, templates)
+            for tag, paths in document_tags(docs).items():
+                tags[tag] |= paths
+            self.parts[(category, subdir)] = (
+                ngram_group(category, subdir, templates),
+                tags,
+                [document_terms(doc) for doc in docs],
+            )
+
+    def build(self, index: dict, documents: dict) -> dict:
+        """인덱스 순서로 조각을 이어 붙인 사이드카 {"ngram", "fulltext", "tags"}"""
+        version = index["updated_at"]
+        keys = [
+            (category, subdir)
+            for category, subcats in index["categories"].items()
+            for subdir in subcats
+            if (category, subdir) in self.parts
+        ]
+        doc_terms = [terms for key in keys for terms in self.parts[key][2]]
+        return {
+            "ngram": assemble_ngram_index(version, (self.parts[key][0] for key in keys)),
+            "fulltext": assemble_fulltext_index(version, _flat_documents(index, documents),
+                                                doc_terms),
+            "tags": assemble_tag_table(version, (self.parts[key][1] for key in keys)),
+        }
+
+
+def _save_quietly(index: dict, output_path: str, store: str, changes: dict,
+                  sidecars: dict) -> dict:
+    with redirect_stdout(io.StringIO()):
+        return save_index(index, output_path, store, changes=changes, sidecars=sidecars)
+
+
+def watch(path: str, output_path: str = None, store: str = "json", poll: bool = False):
+    """로컬 체크아웃을 인덱싱한 뒤 Ctrl+C 까지 수정 사항을 인덱스에 반영"""
+    output_path = output_path or OUTPUT_FILE
+    base = checkout_root(path)
+    if base is None:
+        print(f"Error: {path} is neither a checkout nor a {COMPONENTS_PATH} directory")
+        sys.exit(1)
+    components = base / COMPONENTS_PATH
+
+    # 첫 스캔 중의 수정도 놓치지 않도록 스캔 전에 감시 시작
+    watcher = None if poll else InotifyWatcher.create(components)
+    if watcher is None:
+        print(f"Polling {components} every {POLL_INTERVAL}s")
+        watcher = PollingWatcher(components)
+
+    print(f"Indexing {components}...")
+    index = {
+        "version": "1.0",
+        "updated_at": datetime.now().isoformat(),
+        "source": str(base),
+        "method": "local-watch",
+        "commit": head_commit(str(base)),
+        "categories": scan_categories(base, CATEGORIES)
+    }
+    # 수정되는 것은 작업 트리이므로 해시는 디스크에서 계산
+    hash_templates(base, index["categories"])
+    documents = group_documents(extract_documents(base, index["categories"]))
+    save_index(index, output_path, store, _flat_documents(index, documents))
+    parts = SidecarParts()
+    parts.update(index, documents, expand_keys(index, {(c, WHOLE_CATEGORY) for c in CATEGORIES}))
+    print(f"\nWatching {components} (Ctrl+C to stop)...")
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    pending = set()
+    first = last = 0.0
+    try:
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(last + DEBOUNCE_SECONDS, first + MAX_DELAY_SECONDS)
+                              - time.monotonic())
+            keys = watcher.changes(timeout)
+            now = time.monotonic()
+            if keys:
+                if not pending:
+                    first = now
+                pending |= keys
+                last = now
+            if not pending or now < min(last + DEBOUNCE_SECONDS, first + MAX_DELAY_SECONDS):
+                continue
+
+            # 파일을 다시 읽지 않고 메모리의 인덱스와 비교, 바뀐 subdir 의 사이드카 조각만 갱신
+            start = time.perf_counter()
+            before = snapshot_groups(index, expand_keys(index, pending))
+            apply_changes(index, base, pending, documents)
+            after = snapshot_groups(index, expand_keys(index, pending) | before.keys())
+            before = {key: before.get(key) for key in after}
+            touched = ", ".join(sorted(f"{c}/{s}" for c, s in pending))
+            pending = set()
+            if after == before:
+                continue
+
+            parts.update(index, documents, after.keys())
+            index["updated_at"] = datetime.now().isoformat()
+            changes = diff_indexes(_group_index(before), _group_index(after))
+            report = _save_quietly(index, output_path, store, changes,
+                                   parts.build(index, documents))
+            if report["written"]:
+                print(f"[{datetime.now():%H:%M:%S}] {touched}: "
+                      f"{len(report['added'])} added, {len(report['removed'])} removed, "
+                      f"{len(report['resized'])} resized, {len(report['modified'])} modified "
+                      f"({time.perf_counter() - start:.3f}s)",
+                      flush=True)
+    except (KeyboardInterrupt, SystemExit):
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Keep the AITMPL index in step with a local checkout")
+    parser.add_argument("path", help="Checkout root or its cli-tool/components directory")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help="Output file path")
+    parser.add_argument("--store", choices=["json", "sqlite", "both"], default="json",
+                        help="Index backend")
+    parser.add_argument("--poll", action="store_true",
+                        help="Poll file sizes/mtimes instead of inotify (network filesystems)")
+
+    args = parser.parse_args()
+    watch(args.path, args.output, args.store, args.poll)
+
+
+if __name__ == "__main__":
+    main()